@@ -1,39 +1,286 @@
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook, load_workbook
+from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.merge import MergeCells
+from openpyxl.styles.fonts import DEFAULT_FONT
 
+import math
 import os
-import time
+from pathlib import Path
+
+from matching import build_match_report, match_passports
+from document import as_document, document_path, load_document, output_for_document, save_document
+from docx_export import docx_path, write_docx
+from ekb_list_generator import full_year
+from layout import PageProfile, section_cells, table_pages, write_workbook
+from manifest import changed_pages, page_hashes, save_manifest
+from passport_store import PassportStore, is_store_path
+from profiling import NO_PROFILE
+from sections import add_labels, labels
+from validation import (BAD_DATE_COLUMN, DUPLICATE_QUANTITIES_COLUMN, POSITIONS_COLUMN, RAW_COLUMNS, REPEATED_COLUMN,
+                        build_validation_report, validation_report_path)
+from wrapping import wrap_text
+
+# Столбцы спецификации, которые используются при обработке
+SPEC_COLUMNS = ('Поз.', 'Наименование', 'Кол.')
+# Сколько первых строк листа просматривать в поисках заголовка таблицы
+SPEC_HEADER_SEARCH_ROWS = 30
+
+try:
+    from python_calamine import CalamineWorkbook  # необязательная зависимость: быстрое чтение xlsx
+except ImportError:
+    CalamineWorkbook = None
+
+def _iter_sheet_rows(spec_file):
+    """Строки (кортежи значений) каждого листа книги: через calamine, если установлен, иначе openpyxl read_only."""
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(str(spec_file))
+        for name in workbook.sheet_names:
+            yield iter(workbook.get_sheet_by_name(name).to_python())
+        return
+
+    workbook = load_workbook(spec_file, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _header_text(value):
+    return " ".join(str(value).split()).casefold() if value is not None else ''
 
-# Пути к файлам
-spec_file = "/Users/vladk/Downloads/Telegram Desktop/ЮМП.250.212.045.03 Спецификация.xlsx"
-ekb_file = "/Users/vladk/Downloads/Telegram Desktop/список паспартов ЭКБ.xlsx"
-output_path = "/Users/vladk/Downloads/Telegram Desktop/output/merged_output.xlsx"
+def _find_spec_columns(rows):
+    """
+    Поиск строки заголовка среди первых строк листа.
+    Возвращает индексы столбцов SPEC_COLUMNS (None для отсутствующих) или None, если заголовка нет.
+    """
+    wanted = [_header_text(column) for column in SPEC_COLUMNS]
+    for _, row in zip(range(SPEC_HEADER_SEARCH_ROWS), rows):
+        header = [_header_text(value) for value in row]
+        if wanted[1] not in header:
+            continue
+        return [header.index(column) if column in header else None for column in wanted]
+    return None
+
+def _cell(row, index):
+    if index is None or index >= len(row):
+        return None
+    value = row[index]
+    return None if value == '' else value
+
+def _name_text(value):
+    if value is None:
+        return None
+    # calamine возвращает целые числа как float: 123.0 -> "123"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def _to_number(values):
+    """
+    Целочисленный столбец (Int64), если все значения целые, иначе Float64; нечисловые значения - пропуски.
+    Возвращает (числа, исходные нечисловые значения), второй столбец - для проверки (validation.py).
+    """
+    raw = pd.Series(values, dtype=object)
+    numbers = pd.to_numeric(raw, errors='coerce')
+    invalid = raw.where(numbers.isna() & raw.notna())
+    if ((numbers % 1 == 0) | numbers.isna()).all():
+        return numbers.astype('Int64'), invalid
+    return numbers.astype('Float64'), invalid
+
+def load_specification(spec_file):
+    """
+    Загрузка спецификации из всех листов файла: только столбцы SPEC_COLUMNS.
+    На каждом листе ищется строка заголовка; листы без заголовка и пустые строки пропускаются.
+    Поз. и Кол. - целые числа (Int64), Наименование - строки (string); нечисловые
+    Поз. и Кол. сохраняются в служебных столбцах validation.RAW_COLUMNS.
+    """
+    data = {column: [] for column in SPEC_COLUMNS}
+    for rows in _iter_sheet_rows(spec_file):
+        indices = _find_spec_columns(rows)
+        if indices is None:
+            continue
+        for row in rows:
+            values = [_cell(row, index) for index in indices]
+            if all(value is None for value in values):
+                continue
+            for column, value in zip(SPEC_COLUMNS, values):
+                data[column].append(value)
+
+    positions, raw_positions = _to_number(data['Поз.'])
+    quantities, raw_quantities = _to_number(data['Кол.'])
+    return pd.DataFrame({
+        'Поз.': positions,
+        'Наименование': pd.array([_name_text(name) for name in data['Наименование']], dtype='string'),
+        'Кол.': quantities,
+        RAW_COLUMNS['Поз.']: raw_positions,
+        RAW_COLUMNS['Кол.']: raw_quantities,
+    })
 
 def load_data(spec_file, ekb_file):
     """Загрузка данных из всех листов файла спецификации."""
-    all_sheets = pd.read_excel(spec_file, sheet_name=None)  # Загружаем все листы
-    specification = pd.concat(all_sheets.values(), ignore_index=True)  # Объединяем в один DataFrame
+    specification = load_specification(spec_file)
     passports = pd.read_excel(ekb_file, sheet_name='Лист1', dtype={'Дата': str})  # Дата как текст
     return specification, passports
 
-def prepare_data(specification, passports):
-    """Очистка и подготовка данных."""
+def read_passport_list(ekb_file):
+    """Чтение перечня паспортов ЭКБ из Excel без подготовки."""
+    return pd.read_excel(ekb_file, sheet_name='Лист1', dtype={'Дата': str})  # Дата как текст
+
+# Версия формата кэша паспортов: увеличить при изменении prepare_passports
+PASSPORTS_CACHE_VERSION = 2
+
+def passports_cache_path(ekb_file):
+    """Путь к файлу кэша подготовленного перечня паспортов (рядом с исходным файлом)."""
+    ekb_file = Path(ekb_file)
+    return ekb_file.with_name(f".{ekb_file.name}.passports.pkl")
+
+def _passports_cache_key(ekb_file):
+    stat = os.stat(ekb_file)
+    return (str(Path(ekb_file).resolve()), stat.st_mtime_ns, stat.st_size, PASSPORTS_CACHE_VERSION)
+
+def load_passports(ekb_file, use_cache=True):
+    """
+    Загрузка и подготовка перечня паспортов ЭКБ с кэшированием на диске.
+    Кэш привязан к пути, времени изменения и размеру файла, поэтому
+    при неизменном перечне разбор Excel полностью пропускается.
+    Для файла базы паспортов (*.db) возвращается PassportStore.
+    """
+    if is_store_path(ekb_file):
+        # База паспортов не загружается целиком: merge_data выбирает из нее нужные строки
+        return PassportStore(ekb_file)
+
+    cache_path = passports_cache_path(ekb_file)
+    key = _passports_cache_key(ekb_file)
+
+    if use_cache and cache_path.exists():
+        try:
+            cached = pd.read_pickle(cache_path)
+            if cached.get('key') == key:
+                return cached['passports']
+        except Exception:
+            pass  # Поврежденный или устаревший кэш просто перестраиваем
+
+    passports = prepare_passports(read_passport_list(ekb_file))
+
+    if use_cache:
+        # Пишем во временный файл и атомарно подменяем, т.к. кэш могут обновлять несколько процессов
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            pd.to_pickle({'key': key, 'passports': passports}, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Нет прав на запись рядом с файлом - работаем без кэша
+            if tmp_path.exists():
+                tmp_path.unlink()
+    return passports
+
+def prepare_specification(specification):
+    """
+    Очистка и подготовка спецификации: повторяющиеся наименования объединяются (aggregate_duplicates),
+    строки размечаются по разделам один раз (sections.add_labels) - метки используют все следующие этапы.
+    """
     specification = specification.dropna(subset=['Наименование'])
 
-    # Удаляем дубликаты по 'Наименование'
-    specification = specification.drop_duplicates(subset=['Наименование'], keep='first')
+    # Убираем пробелы по краям один раз: дальнейшие этапы таблицу не изменяют
+    specification = specification.assign(**{'Наименование': specification['Наименование'].str.strip()})
+    return add_labels(aggregate_duplicates(specification))
+
+def _split_groups(codes, values):
+    """Коды групп и кортежи их значений (порядок строк внутри группы сохраняется)."""
+    if not len(codes):
+        return codes, []
+    order = np.argsort(codes, kind='stable')
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return codes[starts], [tuple(chunk.tolist()) for chunk in np.split(values, starts[1:])]
 
+def aggregate_duplicates(specification):
+    """
+    Одна строка на наименование (на месте первого появления): Кол. повторов суммируется,
+    все Поз. собираются в столбец POSITIONS_COLUMN (кортеж в порядке строк спецификации).
+    Количества повторов с разным Кол. сохраняются в DUPLICATE_QUANTITIES_COLUMN, признак
+    повтора - в REPEATED_COLUMN для проверки.
+    Группировка по хэшу наименования (factorize) выполняется только для повторяющихся строк.
+    """
+    names = specification['Наименование']
+    first = ~names.duplicated().to_numpy()
+    result = specification[first]
+    positions = [() if pd.isna(position) else (position,) for position in result['Поз.'].to_numpy(dtype=object)]
+    conflicts = np.full(len(result), pd.NA, dtype=object)
+
+    repeated = names.duplicated(keep=False).to_numpy()
+    if repeated.any():
+        repeats = specification[repeated]
+        # Коды групп идут в порядке первого появления, как и строки result с повторами
+        codes, _ = pd.factorize(repeats['Наименование'])
+        rows = np.flatnonzero(repeated[first])
+        quantities = repeats['Кол.'].groupby(codes)
+
+        totals = result['Кол.'].copy()
+        totals.iloc[rows] = quantities.sum(min_count=1).array
+        repeated_values = {'Кол.': totals}
+        raw = RAW_COLUMNS['Кол.']
+        if raw in result:
+            # Первое нечисловое Кол. среди повторов - для проверки
+            first_raw = result[raw].copy()
+            first_raw.iloc[rows] = repeats[raw].groupby(codes).first().array
+            repeated_values[raw] = first_raw
+        result = result.assign(**repeated_values)
+
+        valid = repeats['Поз.'].notna().to_numpy()
+        groups, values = _split_groups(codes[valid], repeats['Поз.'].to_numpy(dtype=object)[valid])
+        for group, value in zip(groups, values):
+            positions[rows[group]] = value
+
+        differs = (quantities.nunique(dropna=False) > 1).to_numpy()
+        conflicting = differs[codes]
+        groups, values = _split_groups(codes[conflicting], repeats['Кол.'].to_numpy(dtype=object)[conflicting])
+        for group, value in zip(groups, values):
+            conflicts[rows[group]] = value
+    return result.assign(**{POSITIONS_COLUMN: pd.Series(positions, index=result.index, dtype=object),
+                            DUPLICATE_QUANTITIES_COLUMN: conflicts,
+                            REPEATED_COLUMN: repeated[first]})
+
+def prepare_passports(passports):
+    """Очистка и подготовка перечня паспортов."""
     passports.columns = ['Наименование', 'Паспорт', 'Дата']
 
     # Преобразуем дату в строку (если она не строка)
     passports['Дата'] = passports['Дата'].astype(str)
     passports['Дата'] = fix_date_format(passports['Дата'])
+    return passports
+
+def prepare_data(specification, passports):
+    """Очистка и подготовка данных."""
+    return prepare_specification(specification), prepare_passports(passports)
+
+def map_unique(series, func, dtype=object):
+    """
+    Применение скалярной функции к столбцу с малым числом различных значений:
+    func вызывается один раз на каждое уникальное значение, результат
+    раскладывается по строкам индексами (без построчного apply).
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    values = np.array([func(value) for value in uniques], dtype=dtype)
+    return pd.Series(values[codes], index=series.index, name=series.name)
 
+def _fix_date(date_str):
+    if pd.isna(date_str):
+        return date_str
 
-    return specification, passports
+    # Если значение уже является строкой в нужном формате, пропускаем
+    if isinstance(date_str, str) and len(date_str.split('.')) == 2:
+        month, year = date_str.split('.')
+
+        # Добавляем ведущий ноль к месяцу, если нужно
+        month = month.zfill(2)
+
+        # Исправляем год (добавляем 0 если год трехзначный, век - если двузначный)
+        year = year.ljust(4, '0') if len(year) == 3 else full_year(year)
+
+        return f"{month}.{year}"
+    return date_str
 
 def fix_date_format(date_series):
     """
@@ -42,25 +289,10 @@ def fix_date_format(date_series):
     '5.2021' -> '05.2021'
     '1.202' -> '01.2020'
     '12.202' -> '12.2020'
+    '08.23' -> '08.2023' (заключения, импортированные в перечень или базу до приведения дат)
+    Различных дат в перечне немного, поэтому каждая разбирается один раз.
     """
-    def process_date(date_str):
-        if pd.isna(date_str):
-            return date_str
-        
-        # Если значение уже является строкой в нужном формате, пропускаем
-        if isinstance(date_str, str) and len(date_str.split('.')) == 2:
-            month, year = date_str.split('.')
-            
-            # Добавляем ведущий ноль к месяцу, если нужно
-            month = month.zfill(2)
-            
-            # Исправляем год (добавляем 0 если год трехзначный)
-            year = year.ljust(4, '0') if len(year) == 3 else year
-            
-            return f"{month}.{year}"
-        return date_str
-    
-    return date_series.apply(process_date)
+    return map_unique(date_series, _fix_date)
 
 def extract_year_and_add_25(date_str):
     """Извлекает год из строки формата 'MM.YYYY' и прибавляет 25."""
@@ -70,22 +302,40 @@ def extract_year_and_add_25(date_str):
     except (ValueError, IndexError):
         return ""  # Если ошибка, оставляем пустым
 
-def merge_data(specification, passports):
-    """Объединение данных по наименованию."""
-    merged_data = pd.merge(specification, passports, on='Наименование', how='left')
+def _expiry_year(date_str):
+    year = extract_year_and_add_25(date_str) if date_str else ""
+    return np.nan if year == "" else year
 
+def add_expiry_columns(merged_data):
+    """
+    Столбцы 'Дата' (текст MM.YYYY), 'H' (срок службы, Int64) и 'I' (год окончания, Int64)
+    после объединения. Пустые значения H и I - <NA>.
+    Для проверки отмечаются строки с паспортом, дата которого не распознана (BAD_DATE_COLUMN).
+    """
     # Преобразуем столбец "Дата" в строку с явным форматом MM.YYYY
-    merged_data['Дата'] = merged_data['Дата'].apply(lambda x: str(x) if pd.notna(x) else '').str[:7]
+    merged_data['Дата'] = map_unique(merged_data['Дата'], lambda x: str(x)[:7] if pd.notna(x) else '')
 
     # Если "Паспорт" пустой, то "H" остается пустым, иначе заполняем 25
-    merged_data['H'] = merged_data['Паспорт'].apply(lambda x: 25 if pd.notna(x) and x != '' else '')
+    passports = merged_data['Паспорт']
+    has_passport = (passports.notna() & (passports != '')).to_numpy()
+    merged_data['H'] = pd.Series(np.where(has_passport, 25.0, np.nan), index=merged_data.index).astype('Int64')
 
     # Вычисляем "I" только если есть "Дата"
-    merged_data['I'] = merged_data['Дата'].apply(lambda x: extract_year_and_add_25(x) if x else "")
-
+    merged_data['I'] = map_unique(merged_data['Дата'], _expiry_year, dtype=float).astype('Int64')
+    merged_data[BAD_DATE_COLUMN] = has_passport & merged_data['I'].isna().to_numpy()
     return merged_data
 
-
+def merge_data(specification, passports):
+    """
+    Объединение данных по наименованию.
+    Наименования сопоставляются по нормализованному ключу с нечетким поиском для
+    оставшихся строк (см. matching.py); достоверность - в столбце 'Совпадение'.
+    passports - подготовленный перечень или база паспортов PassportStore.
+    """
+    if isinstance(passports, PassportStore):
+        passports = prepare_passports(passports.passports_for(specification['Наименование']))
+    merged_data = match_passports(specification, passports)
+    return add_expiry_columns(merged_data)
 
 def create_result_table(merged_data):
     """Создание результирующей таблицы с пустыми столбцами и нумерацией."""
@@ -103,101 +353,134 @@ def create_result_table(merged_data):
     # result.insert(0, '№', range(1, len(result) + 1))
     return result
 
-def add_section_names(result, specification):
-    """Добавление названий разделов и разбиение длинных наименований."""
-    section_names = specification[specification['Наименование'].str.contains('Конденсаторы|Микросхемы|Диоды|Транзисторы', case=False, na=False)]['Наименование']
-    final_data = []
-
-    for _, row in result.iterrows():
-        name = row['C']
-        if name in section_names.values:
-            final_data.append(['', '', name, '', '', '', '', '', ''])
-        else:
-            words = name.split()  # Разбиваем на слова
-            lines = []
-            current_line = ""
-
-            for word in words:
-                if len(current_line) + len(word) + 1 <= 18:  # +1 для пробела
-                    current_line += (" " if current_line else "") + word
-                else:
-                    lines.append(current_line)
-                    current_line = word
-
-            if current_line:
-                lines.append(current_line)
-
-            # Заполняем строки
-            for i, line in enumerate(lines):
-                if i == 0:
-                    final_data.append([row['A'], "", line, row['D'], row['E'], row['F'], row['G'], row['H'], row['I']])
-                else:
-                    final_data.append(["", "", line, "", "", "", "", "", ""])  # Пустая строка с текстом
-    return final_data
-
+def wrap_names(names, is_section, width):
+    """
+    Строки каждого наименования для expand_lines: перенос по словам с учетом ширины
+    символов шрифта (wrapping.py), width - ширина в цифрах «0» (None - одной строкой).
+    Названия разделов не переносятся.
+    """
+    width = math.inf if width is None else width
+    # Каждое уникальное наименование переносится один раз (и запоминается между запусками)
+    wrapped = {name: wrap_text(name, width) for name in names[~is_section].unique()}
+    # Без компонентов map дает столбец float64, в который нельзя записать списки строк разделов
+    lines = names.map(wrapped).astype(object)
+    lines[is_section] = names[is_section].map(lambda name: [name])
+    return lines
+
+def expand_lines(table, column, lines, is_section):
+    """
+    Разворачивает строки таблицы по спискам строк lines (explode) для столбца column.
+    Продолжения наименований и строки разделов получают пустые остальные столбцы,
+    строки без текста удаляются. Строки одной исходной записи имеют одинаковый индекс.
+    """
+    table = table.reset_index(drop=True).astype(object)
+    table[column] = lines.to_numpy()
+    table = table.explode(column)
+    table = table[table[column].notna()]
 
+    other_columns = [col for col in table.columns if col != column]
+    blank = table.index.duplicated(keep='first') | is_section.to_numpy()[table.index]
+    table.loc[blank, other_columns] = ''
+    # Индекс - номер исходной строки: по нему layout не разрывает перенесенное наименование между страницами
+    return table
 
-from openpyxl.styles import Font, Alignment
+def add_section_names(result, specification):
+    """
+    Добавление названий разделов и разбиение длинных наименований.
+    specification - строки, из которых построен result (в том же порядке), с метками разделов.
+    """
+    names = result['C'].reset_index(drop=True)
+    is_section = pd.Series(labels(specification)['section_mp'].to_numpy(), index=names.index)
+    lines = wrap_names(names, is_section, MP_PROFILE.wrap_width)
+
+    return expand_lines(result, 'C', lines, is_section)
+
+# Ширина столбцов A-I листа МП в пикселях
+MP_COLUMN_WIDTHS = [63, 276, 255, 80, 80, 265, 82, 99, 99]
+MP_ROWS_PER_SHEET = 18
+# Ширина переноса наименований в столбце C (в цифрах «0», по таблице шаблона МП)
+MP_WRAP_WIDTH = 18
+
+# Именованные стили МП: регистрируются в книге один раз и разделяются всеми ячейками
+MP_STYLES = {
+    "МП раздел": dict(font=Font(italic=True)),
+    "МП центр": dict(font=DEFAULT_FONT, alignment=Alignment(horizontal="center", vertical="center")),
+    "МП текст": dict(font=DEFAULT_FONT, alignment=Alignment(horizontal="center", vertical="center"), number_format='@'),
+    "МП дата": dict(font=Font(size=8), alignment=Alignment(horizontal="center", vertical="center"), number_format='@'),
+}
+
+# Базовый стиль каждого столбца A-I (None - без оформления)
+MP_COLUMN_STYLES = [
+    "МП центр", None, None, "МП центр", "МП центр", "МП центр", "МП текст", "МП текст", "МП текст"
+]
+
+def _mp_cell_style(column, value, is_section, line):
+    """Стиль ячейки МП: курсив для разделов в столбце C, шрифт 8 для дат в G (кроме первой строки листа)."""
+    if column == 2:
+        return "МП раздел" if is_section else None
+    if column == 6 and line > 0 and value:
+        return "МП дата"
+    return MP_COLUMN_STYLES[column]
+
+MP_PROFILE = PageProfile(
+    name="МП",
+    rows_per_page=MP_ROWS_PER_SHEET,
+    columns=tuple("ABCDEFGHI"),
+    styles=MP_STYLES,
+    cell_style=_mp_cell_style,
+    section_label='italic_mp',
+    section_columns=('C',),
+    column_widths=tuple(MP_COLUMN_WIDTHS),
+    wrap_width=MP_WRAP_WIDTH,
+)
+
+def as_table(rows, columns):
+    """Приведение строк результата (DataFrame или список строк) к DataFrame с заданными столбцами."""
+    if isinstance(rows, pd.DataFrame):
+        return rows
+    return pd.DataFrame(list(rows), columns=columns)
+
+def pages_to_write(table, output_path, pages, incremental):
+    """
+    Хэши страниц таблицы и номера измененных страниц.
+    Без инкрементального режима изменившимися считаются все страницы.
+    """
+    hashes = page_hashes(table, pages)
+    if incremental:
+        return hashes, changed_pages(output_path, hashes)
+    return hashes, list(range(1, len(hashes) + 1))
 
-def save_to_excel(final_data, output_path):
-    """Сохранение данных в Excel с обработкой ошибки доступа."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Лист1"
-
-    row_count = 0
-    sheet_number = 1
-
-    italic_sections = [
-        "Конденсаторы", "Микросхемы", "Катушки", "индуктивности", "Резисторы",
-        "Печатная плата", "Транзисторы", "Диоды", "Соединения", "контактные"
-    ]
-
-    for row in final_data:
-        if row_count >= 18:
-            sheet_number += 1
-            ws = wb.create_sheet(title=f"Лист{sheet_number}")
-            row_count = 0
-
-        ws.append(row)
-        row_count += 1
-
-    # Применение стилей ко всем листам
-    for sheet in wb.worksheets:
-        # Установка формата текста для столбцов G, H, I
-        for col in sheet.iter_cols(min_col=7, max_col=9):
-            for cell in col:
-                cell.number_format = '@'
-
-        # Установка ширины столбцов
-        column_widths = [63, 276, 255, 80, 80, 265, 82, 99, 99]
-        columns = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
-
-        for col, width in zip(columns, column_widths):
-            sheet.column_dimensions[col].width = width / 13.43
-
-        # Курсив для названий разделов
-        for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=3, max_col=3):
-            for cell in row:
-                if cell.value and any(section in str(cell.value) for section in italic_sections):
-                    cell.font = Font(italic=True)
-
-        # Установка размера шрифта 8 для столбца G
-        for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row, min_col=7, max_col=7):  # Столбец G
-            for cell in row:
-                if cell.value:
-                    cell.font = Font(size=8)  # Устанавливаем размер шрифта 8
-
-        # Выравнивание по центру для столбцов A, D, E, F, G, H, I
-        center_alignment = Alignment(horizontal="center", vertical="center")
-        center_columns = ['A', 'D', 'E', 'F', 'G', 'H', 'I']
-        for col in center_columns:
-            for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=columns.index(col) + 1, max_col=columns.index(col) + 1):
-                for cell in row:
-                    cell.alignment = center_alignment
-
-    # Сохранение файла
-    wb.save(output_path)
+def save_paginated(table, output_path, profile, incremental=False, docx=False):
+    """
+    Разбиение таблицы на страницы по профилю и потоковая запись книги (см. layout.py).
+    Таблица приводится к колоночному виду (document.py) и сохраняется рядом с книгой,
+    чтобы выходные файлы можно было сформировать заново без обработки (render_document).
+    С docx те же страницы записываются в документ DOCX рядом с книгой (см. docx_export.py).
+    В инкрементальном режиме файлы не перезаписываются, если ни одна страница не изменилась.
+    Возвращает номера измененных страниц.
+    """
+    table = as_document(as_table(table, list(profile.columns)))
+    # Ячейки с названиями разделов находятся один раз для разбиения на страницы и записи всех файлов
+    sections = section_cells(table, profile)
+    pages = table_pages(table, profile, sections)
+    hashes, changed = pages_to_write(table, output_path, pages, incremental)
+    if changed or not document_path(output_path).exists():
+        save_document(table, profile.name, document_path(output_path))
+    if docx and (changed or not docx_path(output_path).exists()):
+        write_docx(table, pages, profile, docx_path(output_path), sections)
+    if incremental and not changed:
+        return changed
+
+    write_workbook(table, pages, profile, output_path, sections)
+    save_manifest(output_path, hashes)
+    return changed
+
+def save_to_excel(final_data, output_path, incremental=False, docx=False):
+    """
+    Сохранение перечня ЭКБ для МП в Excel (профиль MP_PROFILE) и, с docx, в документ DOCX.
+    Возвращает номера измененных страниц.
+    """
+    return save_paginated(final_data, output_path, MP_PROFILE, incremental, docx)
 
 # def MK_creator(input_path, output_path):
 #     xls = pd.ExcelFile(input_path)
@@ -267,100 +550,68 @@ def save_to_excel(final_data, output_path):
 #     wb.save(output_path)
 
 def MK_cut_on_section(result, specification):
-    section_names = specification[specification['Наименование'].str.contains('Конденсаторы|Микросхемы|Диоды|Транзисторы|Резисторы|Сборочные единицы', case=False, na=False)]['Наименование']
-    final_data = []
-
-    for _, row in result.iterrows():
-        name = row['A']
-        if name in section_names.values:
-            final_data.append([name, '', ''])
-        else:
-            words = name.split()  # Разбиваем на слова
-            lines = []
-            current_line = ""
-
-            for word in words:
-                # if len(current_line) + len(word) + 1 <= 18:  # +1 для пробела
-                current_line += (" " if current_line else "") + word
-                # else:
-                    # lines.append(current_line)
-                    # current_line = word
-
-            if current_line:
-                lines.append(current_line)
-
-            # Заполняем строки
-            for i, line in enumerate(lines):
-                if i == 0:
-                    final_data.append([line, '',row['C']])
-                else:
-                    final_data.append([line, "", ""])  # Пустая строка с текстом
-    return final_data
-
-def MK_creator(input_path, res, output_path, specification):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Лист1"
-    row_count = 0
-    sheet_number = 1
-
-    italic_sections = [
-        "Конденсаторы", "Микросхемы", "Катушки", "индуктивности", "Резисторы",
-        "Печатная плата", "Транзисторы", "Диоды", "Соединения", "контактные", "Сборочные единицы", "Трансформаторы"
-    ]
+    """
+    Добавление названий разделов для МК. Наименования переносятся по ширине
+    MK_PROFILE.wrap_width (по умолчанию записываются одной строкой без лишних пробелов).
+    specification - строки, из которых построен result (в том же порядке), с метками разделов.
+    """
+    names = result['A'].reset_index(drop=True).astype(str)
+    is_section = pd.Series(labels(specification)['section_mk'].to_numpy(), index=names.index)
+    lines = wrap_names(names, is_section, MK_PROFILE.wrap_width)
+
+    return expand_lines(result, 'A', lines, is_section)
+
+MK_ROWS_PER_SHEET = 13
+# Ширина столбцов A-C листа МК в пикселях
+MK_COLUMN_WIDTHS = [376, 376, 129]
+
+# Именованные стили МК
+MK_STYLES = {
+    "МК текст": dict(font=Font(size=12)),
+    "МК раздел": dict(font=Font(size=12, italic=True, bold=True)),
+    "МК пусто": dict(font=DEFAULT_FONT, number_format='@'),
+}
+
+def _mk_cell_style(column, value, is_section, line):
+    """Стиль ячейки МК: шрифт 12, курсив и полужирный для разделов; пустые ячейки без оформления."""
+    if not value:
+        return None
+    return "МК раздел" if is_section else "МК текст"
+
+MK_PROFILE = PageProfile(
+    name="МК",
+    rows_per_page=MK_ROWS_PER_SHEET,
+    columns=tuple("ABC"),
+    styles=MK_STYLES,
+    cell_style=_mk_cell_style,
+    section_label='italic_mk',
+    section_columns=('A', 'B', 'C'),
+    column_widths=tuple(MK_COLUMN_WIDTHS),
+    # Пустые столбцы D-F и столбцы G-I в текстовом формате
+    trailing_cells=(None, None, None, "МК пусто", "МК пусто", "МК пусто"),
+    # Наименования МК помещаются в столбец A одной строкой; для переноса задать ширину в цифрах «0»
+    wrap_width=None,
+)
+
+def _quantity_text(quantity):
+    """Количество для МК: "5 шт."; дробное количество не округляется."""
+    if pd.isna(quantity):
+        return ""
+    return f"{quantity:g} шт." if quantity % 1 else f"{int(quantity)} шт."
+
+def MK_creator(input_path, res, output_path, specification, incremental=False, docx=False):
+    """
+    Сохранение перечня ЭКБ для МК в Excel (профиль MK_PROFILE) и, с docx, в документ DOCX.
+    Возвращает номера измененных страниц.
+    """
     result = pd.DataFrame({
         'A': res['Наименование'],
         'B': '',
         'C': res.get('Кол.', ''),
     })
-    result['C'] = result['C'].apply(lambda x: str(int(x)) + " шт." if pd.notna(x) else "")
-    final_data = MK_cut_on_section(result, specification)
-    for row in final_data:
-        if row_count >= 13:
-            sheet_number += 1
-            ws = wb.create_sheet(title=f"Лист{sheet_number}")
-            row_count = 0
-
-        ws.append(row)
-        row_count += 1
-
-    # Применение стилей ко всем листам
-    for sheet in wb.worksheets:
-        # Установка формата текста для столбцов G, H, I
-        for col in sheet.iter_cols(min_col=7, max_col=9):
-            for cell in col:
-                cell.number_format = '@'
-
-        # Установка ширины столбцов
-        column_widths = [376, 376, 129]
-        columns = ["A", "B", "C"]
-
-
-
-        # Курсив для названий разделов
-        for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=1, max_col=3):
-            for cell in row:
-                if cell.value:
-                    cell.font = Font(size=12)  # Устанавливаем размер шрифта 8
-                if cell.value and any(section in str(cell.value) for section in italic_sections):
-                    cell.font = Font(size=12, italic=True, bold=True)
-
-        # # Установка размера шрифта 8 для столбца G
-        # for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row, min_col=7, max_col=7):  # Столбец G
-        #     for cell in row:
-        #         if cell.value:
-        #             cell.font = Font(size=8)  # Устанавливаем размер шрифта 8
-
-        # Выравнивание по центру для столбцов A, D, E, F, G, H, I
-        # center_alignment = Alignment(horizontal="center", vertical="center")
-        # center_columns = ['A', 'D', 'E', 'F', 'G', 'H', 'I']
-        # for col in center_columns:
-        #     for row in sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=columns.index(col) + 1, max_col=columns.index(col) + 1):
-        #         for cell in row:
-        #             cell.alignment = center_alignment
-
-    # Сохранение файла
-    wb.save(output_path)
+    result['C'] = result['C'].apply(_quantity_text)
+    final_data = MK_cut_on_section(result, res)
+    return save_paginated(final_data, output_path, MK_PROFILE, incremental, docx)
 
 
 
@@ -373,74 +624,114 @@ def MK_creator(input_path, res, output_path, specification):
     # "Транзисторы", "Диоды", "Соединения контактные"
 
 
-def main():
-    """Основная функция."""
-    specification, passports = load_data(spec_file, ekb_file)
-    specification, passports = prepare_data(specification, passports)
-    specification = filter_unwanted_sections(specification)
-
-    # Создание основной книги
-    merged_data = merge_data(specification, passports)
-    result = create_result_table(merged_data)
-    final_data = add_section_names(result, specification)
-    save_to_excel(final_data, output_path)
-
-    # Создание книги с группировкой
-    # create_grouped_book(final_data)
 
 
-    # === Обработка ошибки PermissionError ===
-    attempt = 0
-    while attempt < 3:
-        try:
-            wb.save(output_grouped_path)
-            print(f"Файл успешно сохранён: {output_grouped_path}")
-            return
-        except PermissionError:
-            print(f"Ошибка: Файл {output_grouped_path} уже открыт. Закройте его и попробуйте снова.")
-            time.sleep(3)  # Подождём перед повторной попыткой
-            attempt += 1
-        except FileNotFoundError:
-            print(f"Ошибка: Папка для сохранения не существует! Проверьте путь: {os.path.dirname(output_grouped_path)}")
-            return
 
-    print("Не удалось сохранить файл. Проверьте права доступа или попробуйте изменить путь.")
+# Профили страниц по имени, сохраненному в документе
+PROFILES = {profile.name: profile for profile in (MP_PROFILE, MK_PROFILE)}
 
+def render_document(document_file, output_path=None, docx=False):
+    """
+    Формирование выходных файлов из сохраненного документа (output_MP.feather и т.п.)
+    без загрузки спецификации и объединения с перечнем ЭКБ.
+    По умолчанию книга сохраняется рядом с документом. Возвращает {путь: номера страниц}.
+    """
+    table, profile_name = load_document(document_file)
+    output_path = Path(output_path) if output_path else output_for_document(document_file)
+    created = {output_path: save_paginated(table, output_path, PROFILES[profile_name], docx=docx)}
+    if docx:
+        created[docx_path(output_path)] = created[output_path]
+    return created
 
+def unwanted_mask(specification, label):
+    """Булева маска строк ненужных разделов (label: 'unwanted_mp' или 'unwanted_mk')."""
+    return labels(specification)[label]
 
 def filter_unwanted_sections(specification):
-    """Фильтрация ненужных разделов."""
-    unwanted_sections = ["Документация", "Сборочный чертеж", "Сборочные единицы", "Плата печатная", "Прочие изделия", "Джамперы", "Оловянная перемычка"]
-
-    # Убираем пробелы и приводим к нижнему регистру для точности сравнения
-    specification['Наименование'] = specification['Наименование'].str.strip()
-
-    # Применяем фильтрацию
-    filtered_specification = specification[~specification['Наименование'].str.contains('|'.join(unwanted_sections), case=False, na=False)]
-
-    return filtered_specification
+    """
+    Фильтрация ненужных разделов для МП.
+    Исходная таблица не изменяется, поэтому МП и МК строятся по одной общей спецификации.
+    """
+    return specification[~unwanted_mask(specification, 'unwanted_mp')]
 
 def filter_unwanted_sections_MK(specification):
-    """Фильтрация ненужных разделов."""
-    unwanted_sections = ["Документация", "Сборочный чертеж", "Прочие изделия", "Джамперы", "Оловянная перемычка"]
+    """Фильтрация ненужных разделов для МК (без изменения исходной таблицы)."""
+    return specification[~unwanted_mask(specification, 'unwanted_mk')]
 
-    # Убираем пробелы и приводим к нижнему регистру для точности сравнения
-    specification['Наименование'] = specification['Наименование'].str.strip()
+def match_report_path(output_path):
+    """Путь к отчету о сопоставлении с перечнем ЭКБ (рядом с output_MP.xlsx)."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.match_report.json")
 
-    # Применяем фильтрацию
-    filtered_specification = specification[~specification['Наименование'].str.contains('|'.join(unwanted_sections), case=False, na=False)]
+class ProcessingCancelled(Exception):
+    """Обработка прервана пользователем."""
 
-    return filtered_specification
+# Этапы формирования МП и МК, о начале которых сообщает callback on_stage
+MP_STAGES = ("МП: объединение", "МП: запись")
+MK_STAGES = ("МК: запись",)
 
-def main():
-    """Основная функция."""
-    specification, passports = load_data(spec_file, ekb_file)
-    specification, passports = prepare_data(specification, passports)
-    specification = filter_unwanted_sections(specification)
-    merged_data = merge_data(specification, passports)
-    result = create_result_table(merged_data)
-    final_data = add_section_names(result, specification)
-    save_to_excel(final_data, output_path)
+def _no_stage(stage):
+    pass
 
-if __name__ == "__main__":
-    main()
+def build_MP(specification, passports, output_path, on_stage=_no_stage, incremental=False, profile=NO_PROFILE,
+             docx=False):
+    """
+    Формирование перечня ЭКБ для МП из подготовленных данных.
+    on_stage(название) вызывается перед каждым этапом из MP_STAGES и может прервать
+    обработку, выбросив ProcessingCancelled. Этапы замеряются профилем profile
+    (profiling.PipelineProfile). Возвращает номера измененных страниц.
+    """
+    on_stage(MP_STAGES[0])
+    specification_mp = profile.call(filter_unwanted_sections, specification)
+    merged_data = profile.call(merge_data, specification_mp, passports)
+    profile.call(build_match_report, merged_data).save(match_report_path(output_path))
+    validation = profile.call(build_validation_report, merged_data)
+    validation.save(validation_report_path(output_path))
+    validation.save_sheet(validation_report_path(output_path, ".xlsx"))
+    result = profile.call(create_result_table, merged_data)
+    final_data = profile.call(add_section_names, result, specification_mp)
+
+    on_stage(MP_STAGES[1])
+    return profile.call(save_to_excel, final_data, output_path, incremental=incremental, docx=docx)
+
+def build_MK(spec_file, specification, output_path, on_stage=_no_stage, incremental=False, profile=NO_PROFILE,
+             docx=False):
+    """Формирование перечня ЭКБ для МК из подготовленных данных (этапы MK_STAGES)."""
+    on_stage(MK_STAGES[0])
+    specification_mk = profile.call(filter_unwanted_sections_MK, specification)
+    return profile.call(MK_creator, spec_file, specification_mk, output_path, specification, incremental=incremental,
+                        docx=docx)
+
+def load_prepared(spec_file, ekb_file, profile=NO_PROFILE):
+    """Загрузка и подготовка спецификации и перечня паспортов (или базы паспортов)."""
+    specification = profile.call(load_specification, spec_file)
+    specification = profile.call(prepare_specification, specification)
+    passports = profile.call(load_passports, ekb_file)
+    return specification, passports
+
+def process_specification(spec_file, ekb_file, output_dir=None, make_mp=True, make_mk=True, incremental=False,
+                          profile=NO_PROFILE, docx=False, prepared=None, on_stage=_no_stage):
+    """
+    Полная обработка одной спецификации: загрузка, подготовка и формирование МП/МК.
+    По умолчанию результаты сохраняются в папку output рядом со спецификацией;
+    с docx рядом с каждой книгой сохраняется готовый документ DOCX.
+    prepared - уже подготовленные (спецификация, паспорта), например из кэша режима
+    наблюдения или рабочего процесса сервиса; тогда файлы не загружаются.
+    on_stage передается в build_MP и build_MK.
+    Возвращает словарь {путь к выходному файлу: номера измененных страниц}.
+    """
+    output_dir = Path(output_dir) if output_dir else Path(spec_file).parent / "output"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    specification, passports = prepared if prepared is not None else load_prepared(spec_file, ekb_file, profile)
+
+    created = {}
+    if make_mp:
+        mp_path = output_dir / "output_MP.xlsx"
+        created[mp_path] = build_MP(specification, passports, mp_path, on_stage, incremental, profile, docx)
+    if make_mk:
+        mk_path = output_dir / "output_MK.xlsx"
+        created[mk_path] = build_MK(spec_file, specification, mk_path, on_stage, incremental, profile, docx)
+    if docx:
+        created.update({docx_path(path): pages for path, pages in list(created.items())})
+    return created
@@ -0,0 +1,60 @@
+"""
+Загрузка многолистовой спецификации: прежний pd.read_excel(sheet_name=None) со всеми
+столбцами и объединением листов против load_specification (только нужные столбцы,
+потоковое чтение openpyxl read_only или calamine).
+
+Каждый вариант запускается в отдельном процессе, чтобы пики памяти не смешивались.
+
+Запуск:
+    python benchmarks/bench_load.py [число строк]
+"""
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_memory import peak_rss_mb
+
+VARIANTS = ("read_excel", "load_specification")
+
+
+def run_variant(variant, spec_file):
+    """Загрузка спецификации выбранным способом; печатает время и прирост пикового RSS."""
+    import pandas as pd
+
+    import backend
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if variant == "read_excel":
+        specification = pd.concat(pd.read_excel(spec_file, sheet_name=None).values(), ignore_index=True)
+    else:
+        specification = backend.load_specification(spec_file)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.2f} {peak_rss_mb() - baseline:.1f} {len(specification)}")
+
+
+def main(n_rows=50_000):
+    from backend import CalamineWorkbook
+    from benchmarks.synthetic import write_specification_workbook
+
+    with tempfile.TemporaryDirectory() as directory:
+        spec_file = str(Path(directory) / "spec.xlsx")
+        write_specification_workbook(spec_file, n_rows)
+        print(f"Спецификация: {n_rows} строк, чтение {'calamine' if CalamineWorkbook else 'openpyxl read_only'}")
+        for variant in VARIANTS:
+            elapsed, peak, rows = subprocess.run(
+                [sys.executable, __file__, "--variant", variant, spec_file],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            print(f"{variant}: {elapsed} с, прирост пикового RSS {peak} МБ, строк {rows}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--variant":
+        run_variant(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,72 @@
+"""
+Пиковое потребление памяти (RSS) при подготовке данных для МП и МК:
+прежний вариант с copy.deepcopy спецификации для каждой ветки против
+общей спецификации с фильтрацией булевыми масками.
+
+Каждый вариант запускается в отдельном процессе, чтобы пики не смешивались.
+
+Запуск:
+    python benchmarks/bench_memory.py [число строк]
+"""
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+VARIANTS = ("deepcopy", "masks")
+
+
+def peak_rss_mb():
+    """Пиковый RSS текущего процесса в МБ (ru_maxrss: КБ в Linux, байты в macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_variant(variant, n_rows):
+    """
+    Подготовка таблиц МП и МК выбранным способом; печатает прирост пикового RSS после
+    фильтрации разделов и после объединения с перечнем.
+    """
+    import copy
+
+    import pandas as pd
+
+    from backend import (create_result_table, filter_unwanted_sections, filter_unwanted_sections_MK,
+                         merge_data, prepare_specification)
+    from benchmarks.synthetic import make_board_specification
+
+    # Уникальные наименования платы: у каждой строки спецификации не больше одного паспорта
+    specification = prepare_specification(make_board_specification(n_rows))
+    passports = pd.DataFrame({'Наименование': specification['Наименование'], 'Паспорт': 'ПДРФ.28П23-1', 'Дата': '08.2023'})
+    baseline = peak_rss_mb()
+
+    if variant == "deepcopy":
+        specification_mp = filter_unwanted_sections(copy.deepcopy(specification))
+        specification_mk = filter_unwanted_sections_MK(copy.deepcopy(specification))
+    else:
+        specification_mp = filter_unwanted_sections(specification)
+        specification_mk = filter_unwanted_sections_MK(specification)
+    filtered = peak_rss_mb()
+    create_result_table(merge_data(specification_mp, passports))
+    create_result_table(merge_data(specification_mk, passports))
+
+    print(f"{filtered - baseline:.1f} {peak_rss_mb() - baseline:.1f}")
+
+
+def main(n_rows=100_000):
+    print(f"Спецификация: {n_rows} строк")
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, str(n_rows)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        print(f"{variant}: прирост пикового RSS после фильтрации {output[0]} МБ, с объединением {output[1]} МБ")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--variant":
+        run_variant(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,70 @@
+"""
+Микро-замеры обработки дат и столбцов H/I после объединения (merge_data)
+в сравнении с прежними построчными реализациями через apply.
+
+Запуск:
+    python benchmarks/bench_merge.py [число строк]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import add_expiry_columns, extract_year_and_add_25, fix_date_format
+from benchmarks.synthetic import make_dates, make_passports
+
+REPEATS = 5
+
+
+def legacy_fix_date_format(date_series):
+    """Прежняя построчная реализация fix_date_format."""
+    def process_date(date_str):
+        if pd.isna(date_str):
+            return date_str
+        if isinstance(date_str, str) and len(date_str.split('.')) == 2:
+            month, year = date_str.split('.')
+            month = month.zfill(2)
+            year = year.ljust(4, '0') if len(year) == 3 else year
+            return f"{month}.{year}"
+        return date_str
+    return date_series.apply(process_date)
+
+
+def legacy_add_expiry_columns(merged_data):
+    """Прежняя построчная обработка столбцов после объединения."""
+    merged_data['Дата'] = merged_data['Дата'].apply(lambda x: str(x) if pd.notna(x) else '').str[:7]
+    merged_data['H'] = merged_data['Паспорт'].apply(lambda x: 25 if pd.notna(x) and x != '' else '')
+    merged_data['I'] = merged_data['Дата'].apply(lambda x: extract_year_and_add_25(x) if x else "")
+    return merged_data
+
+
+def best_time(func, make_input):
+    """Лучшее время из REPEATS запусков; входные данные готовятся заново перед каждым запуском."""
+    timer = timeit.Timer("func(data)", setup="data = make_input()", globals={'func': func, 'make_input': make_input})
+    return min(timer.repeat(repeat=REPEATS, number=1))
+
+
+def main(n_rows=100_000):
+    dates = make_dates(n_rows)
+    merged = make_passports(n_rows)
+    # Часть строк без паспорта, как после левого соединения
+    merged.loc[merged.index % 10 == 0, ['Паспорт', 'Дата']] = None
+    merged['Дата'] = fix_date_format(merged['Дата'].astype(str)).where(merged['Дата'].notna())
+
+    cases = [
+        ("fix_date_format", legacy_fix_date_format, fix_date_format, lambda: dates.copy()),
+        ("add_expiry_columns", legacy_add_expiry_columns, add_expiry_columns, lambda: merged.copy()),
+    ]
+    print(f"Строк: {n_rows}, лучшее из {REPEATS} запусков")
+    for title, legacy, vectorized, make_input in cases:
+        legacy_time = best_time(legacy, make_input)
+        new_time = best_time(vectorized, make_input)
+        print(f"{title:<20} apply {legacy_time * 1000:8.1f} мс   векторно {new_time * 1000:8.1f} мс   "
+              f"ускорение x{legacy_time / new_time:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
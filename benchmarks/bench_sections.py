@@ -0,0 +1,90 @@
+"""
+Сравнение построчной (iterrows) и векторизованной реализаций
+add_section_names и MK_cut_on_section на синтетической спецификации.
+Прежние реализации переносят наименования так же, как текущие (wrapping.wrap_text
+по ширине профиля), поэтому замеряется только обход строк, а результат совпадает по числу строк.
+
+Запуск:
+    python benchmarks/bench_sections.py [число строк]
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import MP_PROFILE, add_section_names, MK_cut_on_section
+from benchmarks.synthetic import make_specification
+from wrapping import text_width, wrap_text
+
+# Шаблоны разделов прежней реализации
+SECTION_PATTERN_MP = 'Конденсаторы|Микросхемы|Диоды|Транзисторы'
+SECTION_PATTERN_MK = 'Конденсаторы|Микросхемы|Диоды|Транзисторы|Резисторы|Сборочные единицы'
+
+
+def legacy_add_section_names(result, specification):
+    """Прежняя построчная реализация add_section_names (перенос - как в текущей)."""
+    section_names = specification[specification['Наименование'].str.contains(SECTION_PATTERN_MP, case=False, na=False)]['Наименование']
+    final_data = []
+    for _, row in result.iterrows():
+        name = row['C']
+        if name in section_names.values:
+            final_data.append(['', '', name, '', '', '', '', '', ''])
+        else:
+            for i, line in enumerate(wrap_text(name, MP_PROFILE.wrap_width)):
+                if i == 0:
+                    final_data.append([row['A'], "", line, row['D'], row['E'], row['F'], row['G'], row['H'], row['I']])
+                else:
+                    final_data.append(["", "", line, "", "", "", "", "", ""])
+    return final_data
+
+
+def legacy_MK_cut_on_section(result, specification):
+    """Прежняя построчная реализация MK_cut_on_section."""
+    section_names = specification[specification['Наименование'].str.contains(SECTION_PATTERN_MK, case=False, na=False)]['Наименование']
+    final_data = []
+    for _, row in result.iterrows():
+        name = row['A']
+        if name in section_names.values:
+            final_data.append([name, '', ''])
+        else:
+            line = " ".join(name.split())
+            if line:
+                final_data.append([line, '', row['C']])
+    return final_data
+
+
+def measure(func, *args):
+    # Обе реализации начинают с пустого кэша переносов
+    wrap_text.cache_clear()
+    text_width.cache_clear()
+    start = time.perf_counter()
+    output = func(*args)
+    return time.perf_counter() - start, output
+
+
+def main(n_rows=50_000):
+    specification = make_specification(n_rows)
+    mp_result = pd.DataFrame({
+        'A': specification['Поз.'] - 1, 'B': '', 'C': specification['Наименование'],
+        'D': specification['Кол.'], 'E': specification['Кол.'],
+        'F': 'ПДРФ.28П23-1', 'G': '08.2023', 'H': 25, 'I': 2048,
+    })
+    mk_result = pd.DataFrame({'A': specification['Наименование'], 'B': '', 'C': '1 шт.'})
+
+    print(f"Спецификация: {n_rows} строк")
+    for title, legacy, vectorized, result in (
+        ("add_section_names", legacy_add_section_names, add_section_names, mp_result),
+        ("MK_cut_on_section", legacy_MK_cut_on_section, MK_cut_on_section, mk_result),
+    ):
+        legacy_time, legacy_rows = measure(legacy, result, specification)
+        new_time, new_rows = measure(vectorized, result, specification)
+        assert len(legacy_rows) == len(new_rows), "Число строк результата не совпадает"
+        print(f"{title}: iterrows {legacy_time:.3f} с, векторизованно {new_time:.3f} с, "
+              f"ускорение x{legacy_time / new_time:.1f} ({len(new_rows)} строк)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
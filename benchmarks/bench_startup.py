@@ -0,0 +1,108 @@
+"""
+Время запуска графического интерфейса.
+
+1. Импорт main.py по данным `python -X importtime`: общее время, самые долгие модули и
+   проверка, что pandas и openpyxl не импортируются до показа окна.
+2. Время от запуска процесса до показа окна для `python main.py` и для собранного
+   EXE (PyInstaller): программа запускается с переменной EKB_STARTUP_BENCHMARK и
+   закрывается сразу после показа окна.
+
+Результаты можно дописывать в файл истории (по строке JSON на запуск), чтобы
+отслеживать время запуска между версиями.
+
+Запуск:
+    python benchmarks/bench_startup.py [--exe dist/main.exe] [--runs 5] [--history startup_history.jsonl]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from frontend import STARTUP_BENCHMARK_ENV  # noqa: E402  (PyQt6 и yaml, без pandas)
+
+# Модули, которые не должны загружаться до показа окна
+HEAVY_MODULES = ("pandas", "openpyxl", "numpy")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """Строки вывода -X importtime: {модуль: (собственное время, накопленное время, вложенность)} в мкс."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own), int(cumulative), (len(indent) - 1) // 2)
+    return modules
+
+
+def measure_imports(top=10):
+    """Импорт main.py в отдельном процессе: (общее время в мс, самые долгие модули, тяжелые модули)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stderr
+    modules = parse_importtime(stderr)
+    total_ms = sum(cumulative for _, cumulative, depth in modules.values() if depth == 0) / 1000
+    slowest = sorted(((cumulative / 1000, name) for name, (_, cumulative, _) in modules.items()), reverse=True)[:top]
+    heavy = sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES and "." not in name)
+    return total_ms, slowest, heavy
+
+
+def measure_launch(command, runs):
+    """Медианное время (мс) от запуска процесса до закрытия окна сразу после показа."""
+    env = dict(os.environ, **{STARTUP_BENCHMARK_ENV: "1"})
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер времени запуска графического интерфейса.")
+    parser.add_argument("--exe", help="Собранный EXE (например, dist/main.exe)")
+    parser.add_argument("--runs", type=int, default=5, help="Число запусков для медианы")
+    parser.add_argument("--history", help="Файл истории замеров (JSON Lines)")
+    args = parser.parse_args(argv)
+
+    import_ms, slowest, heavy = measure_imports()
+    print(f"Импорт main.py: {import_ms:.0f} мс")
+    for cumulative_ms, name in slowest:
+        print(f"  {cumulative_ms:8.1f} мс  {name}")
+    if heavy:
+        print(f"ВНИМАНИЕ: до показа окна импортируются {', '.join(heavy)}")
+
+    record = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "import_ms": round(import_ms, 1),
+        "heavy_modules": heavy,
+        "launch_ms": round(measure_launch([sys.executable, "main.py"], args.runs), 1),
+    }
+    print(f"Запуск python main.py до показа окна: {record['launch_ms']:.0f} мс")
+    if args.exe:
+        record["exe_launch_ms"] = round(measure_launch([str(Path(args.exe).resolve())], args.runs), 1)
+        print(f"Запуск {args.exe} до показа окна: {record['exe_launch_ms']:.0f} мс")
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Синтетические данные для набора замеров: книги спецификации (несколько листов) и
+перечня паспортов размером 1k/10k/100k строк создаются один раз за запуск.
+"""
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import filter_unwanted_sections, load_passports, prepare_passports, prepare_specification  # noqa: E402
+from benchmarks.synthetic import (make_board_specification, make_passport_list, write_passport_workbook,  # noqa: E402
+                                  write_specification_workbook)
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+# Повторов на размер: полная обработка 100k строк занимает минуты
+ROUNDS = {"1k": 5, "10k": 3, "100k": 1}
+# Размер спецификации для отдельного замера объединения с перечнем (merge_data) при любом --sizes
+MERGE_SIZES = {"50k": 50_000}
+
+
+@dataclass
+class Dataset:
+    """Файлы и подготовленные таблицы одного размера."""
+    size: str
+    rounds: int
+    spec_file: Path
+    ekb_file: Path
+    specification: object
+    passports: object
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sizes", default="1k,10k",
+                     help=f"Размеры спецификации через запятую из {', '.join(SIZES)} (по умолчанию 1k,10k)")
+
+
+def pytest_generate_tests(metafunc):
+    if "merge_tables" in metafunc.fixturenames:
+        metafunc.parametrize("size", list(MERGE_SIZES), scope="session")
+    elif "size" in metafunc.fixturenames:
+        sizes = [size.strip() for size in metafunc.config.getoption("--sizes").split(",") if size.strip()]
+        unknown = [size for size in sizes if size not in SIZES]
+        if unknown:
+            raise pytest.UsageError(f"Неизвестные размеры: {', '.join(unknown)}")
+        metafunc.parametrize("size", sizes, scope="session")
+
+
+@pytest.fixture(scope="session")
+def dataset(size, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(f"data_{size}")
+    spec_file = directory / "spec.xlsx"
+    ekb_file = directory / "ekb.xlsx"
+    specification = write_specification_workbook(spec_file, SIZES[size])
+    write_passport_workbook(ekb_file, make_passport_list(specification))
+    return Dataset(size, ROUNDS[size], spec_file, ekb_file, prepare_specification(specification),
+                   load_passports(ekb_file, use_cache=False))
+
+
+@pytest.fixture(scope="session")
+def merge_tables(size):
+    """Спецификация и перечень паспортов из MERGE_SIZES без записи книг Excel."""
+    specification = prepare_specification(make_board_specification(MERGE_SIZES[size]))
+    return filter_unwanted_sections(specification), prepare_passports(make_passport_list(specification))
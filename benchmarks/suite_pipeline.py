@@ -0,0 +1,81 @@
+"""
+Замеры этапов и полного формирования МП и МК на синтетических данных (pytest-benchmark).
+
+Запуск из папки benchmarks:
+    python -m pytest                          # 1k и 10k строк
+    python -m pytest --sizes 100k             # большая спецификация
+    python -m pytest --benchmark-compare      # сравнение с предыдущим сохраненным запуском
+"""
+import pandas as pd
+
+from backend import (add_section_names, build_MK, build_MP, create_result_table, filter_unwanted_sections,
+                     load_passports, load_specification, merge_data, prepare_specification, process_specification)
+from matching import component_mask
+
+# Замена цифр, после которой наименования спецификации не совпадают с перечнем
+_SHIFT_DIGITS = str.maketrans("0123456789", "1234567890")
+
+
+def run(benchmark, dataset, func, *args, **kwargs):
+    benchmark.extra_info["rows"] = len(dataset.specification)
+    return benchmark.pedantic(func, args, kwargs, rounds=dataset.rounds, iterations=1)
+
+
+def bench_load_specification(benchmark, dataset):
+    run(benchmark, dataset, load_specification, dataset.spec_file)
+
+
+def bench_load_passports(benchmark, dataset):
+    run(benchmark, dataset, load_passports, dataset.ekb_file, use_cache=False)
+
+
+def bench_prepare_specification(benchmark, dataset):
+    specification = load_specification(dataset.spec_file)
+    run(benchmark, dataset, prepare_specification, specification)
+
+
+def bench_prepare_repeated_specification(benchmark, dataset):
+    # Каждое наименование на трех листах: объединение повторов с суммой количеств
+    specification = load_specification(dataset.spec_file)
+    run(benchmark, dataset, prepare_specification, pd.concat([specification] * 3, ignore_index=True))
+
+
+def bench_merge_data(benchmark, dataset):
+    specification = filter_unwanted_sections(dataset.specification)
+    run(benchmark, dataset, merge_data, specification, dataset.passports)
+
+
+def bench_merge_data_large(benchmark, merge_tables):
+    # Около 10% компонентов без точного совпадения: нечеткий поиск не должен расти квадратично
+    specification, passports = merge_tables
+    benchmark.extra_info["rows"] = len(specification)
+    benchmark.pedantic(merge_data, (specification, passports), rounds=1, iterations=1)
+
+
+def bench_merge_unmatched(benchmark, dataset):
+    # Ни один компонент не найден в перечне (цифры наименований изменены): нечеткий поиск для каждой
+    # строки и соединение без совпадений
+    specification = filter_unwanted_sections(dataset.specification)
+    unmatched = specification.assign(Наименование=specification['Наименование'].str.translate(_SHIFT_DIGITS))
+    sections_only = merge_data(unmatched[~component_mask(unmatched)], dataset.passports)
+    assert sections_only['Паспорт'].isna().all()
+    merged = run(benchmark, dataset, merge_data, unmatched, dataset.passports)
+    assert merged['Паспорт'].isna().all()
+
+
+def bench_add_section_names(benchmark, dataset):
+    specification = filter_unwanted_sections(dataset.specification)
+    result = create_result_table(merge_data(specification, dataset.passports))
+    run(benchmark, dataset, add_section_names, result, specification)
+
+
+def bench_build_MP(benchmark, dataset, tmp_path):
+    run(benchmark, dataset, build_MP, dataset.specification, dataset.passports, tmp_path / "output_MP.xlsx")
+
+
+def bench_build_MK(benchmark, dataset, tmp_path):
+    run(benchmark, dataset, build_MK, str(dataset.spec_file), dataset.specification, tmp_path / "output_MK.xlsx")
+
+
+def bench_process_specification(benchmark, dataset, tmp_path):
+    run(benchmark, dataset, process_specification, str(dataset.spec_file), str(dataset.ekb_file), tmp_path)
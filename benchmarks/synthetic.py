@@ -0,0 +1,182 @@
+"""
+Генераторы синтетических спецификаций для замеров производительности.
+"""
+import random
+
+import pandas as pd
+
+SECTIONS = [
+    "Конденсаторы", "Микросхемы", "Резисторы", "Диоды", "Транзисторы",
+    "Катушки индуктивности", "Соединения контактные",
+]
+
+COMPONENTS = [
+    "Р1-12-0,125 2 кОм ±5% ШКАБ.434110.018 ТУ",
+    "К10-17в 50 В 0,1 мкФ Н90 ±20% ОЖ0.460.107 ТУ",
+    "1564ЛА3 АЕЯР.431200.424-13ТУ",
+    "2Д522Б дР3.362.029 ТУ",
+    "2Т3129А9 аА0.336.668 ТУ",
+    "ВП1-2 АГ0.481.303 ТУ",
+    "Р1-12 20к",
+]
+
+
+def make_specification(n_rows, seed=0):
+    """
+    Спецификация из n_rows строк: заголовки разделов чередуются с компонентами,
+    часть наименований длиннее 18 символов и переносится.
+    """
+    rng = random.Random(seed)
+    rows = []
+    position = 1
+    for i in range(n_rows):
+        if i % 20 == 0:
+            rows.append({'Поз.': None, 'Наименование': rng.choice(SECTIONS), 'Кол.': None})
+        else:
+            name = f"{rng.choice(COMPONENTS)} {i}"
+            rows.append({'Поз.': position, 'Наименование': name, 'Кол.': rng.randint(1, 20)})
+            position += 1
+    return pd.DataFrame(rows)
+
+
+DATE_FORMATS = ["{m}.{y}", "{m:02d}.{y}", "{m}.{y3}", "{m:02d}.{y3}"]
+
+
+def make_dates(n_rows, seed=0):
+    """Даты изготовления в разных записях: '5.2021', '05.2021', '1.202', а также пропуски."""
+    rng = random.Random(seed)
+    dates = []
+    for _ in range(n_rows):
+        if rng.random() < 0.05:
+            dates.append("nan")
+            continue
+        year = rng.randint(2010, 2029)
+        template = rng.choice(DATE_FORMATS)
+        dates.append(template.format(m=rng.randint(1, 12), y=year, y3=str(year)[:3]))
+    return pd.Series(dates, dtype=object)
+
+
+def make_passports(n_rows, seed=0):
+    """Перечень паспортов из n_rows строк в формате после prepare_passports."""
+    rng = random.Random(seed)
+    names = [f"{rng.choice(COMPONENTS)} {i}" for i in range(n_rows)]
+    return pd.DataFrame({
+        'Наименование': names,
+        'Паспорт': [f"ПДРФ.28П23-{i}" for i in range(n_rows)],
+        'Дата': make_dates(n_rows, seed),
+    })
+
+
+# Разделы платы в порядке спецификации: (заголовок, шаблоны наименований компонентов)
+BOARD_SECTIONS = [
+    ("Документация", ["Сборочный чертеж ЮМП.{n:06d} СБ", "Схема электрическая принципиальная ЮМП.{n:06d} Э3"]),
+    ("Сборочные единицы", ["Плата печатная ЮМП.{n:06d}"]),
+    ("Катушки индуктивности", ["Дроссель ДМ-0,1-{v} мкГн ±5% ГИ0.477.005 ТУ"]),
+    ("Конденсаторы", ["К10-17в 50 В {v} мкФ Н90 ±20% ОЖ0.460.107 ТУ", "К53-65 16 В {v} мкФ ±20% АЖЯР.673546.006 ТУ"]),
+    ("Микросхемы", ["1564ЛА{v} АЕЯР.431200.424-13ТУ", "5559ИН{v}Т АЕНВ.431230.271 ТУ"]),
+    ("Резисторы", ["Р1-12-0,125 {v} кОм ±5% ШКАБ.434110.018 ТУ", "Р1-12 {v}к"]),
+    ("Диоды", ["2Д522Б дР3.362.029 ТУ {v}"]),
+    ("Транзисторы", ["2Т3129А9 аА0.336.668 ТУ {v}"]),
+    ("Соединения контактные", ["Вилка СНП346-{v}ВП21-2 РЮМК.430420.003 ТУ"]),
+    ("Прочие изделия", ["Джамперы ВП1-2 АГ0.481.303 ТУ {v}"]),
+]
+
+# Номиналы ряда E24 в нескольких декадах
+NOMINALS = [f"{value * decade:g}".replace(".", ",") for decade in (1, 10, 100) for value in (
+    1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0, 3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1)]
+
+
+def make_board_specification(n_rows, seed=0):
+    """
+    Спецификация платы из n_rows строк: разделы в порядке конструкторской документации
+    (документация, сборочные единицы, компоненты по типам, прочие изделия), в каждом -
+    компоненты своего типа. Наименования уникальны (повторы prepare_specification объединяет),
+    большинство длиннее 18 символов и переносится в МП.
+    """
+    rng = random.Random(seed)
+    rows = []
+    used = set()
+    position = 1
+    per_section = max(n_rows // len(BOARD_SECTIONS) - 1, 1)
+    while len(rows) < n_rows:
+        for section, templates in BOARD_SECTIONS:
+            rows.append({'Поз.': None, 'Наименование': section, 'Кол.': None})
+            for _ in range(min(per_section, n_rows - len(rows))):
+                name = rng.choice(templates).format(n=position, v=rng.choice(NOMINALS))
+                if name in used:
+                    name = f"{name} вар. {position}"
+                used.add(name)
+                rows.append({'Поз.': position, 'Наименование': name, 'Кол.': rng.randint(1, 20)})
+                position += 1
+            if len(rows) >= n_rows:
+                break
+    return pd.DataFrame(rows[:n_rows])
+
+
+def make_passport_list(specification, coverage=0.9, extra=0.5, seed=0):
+    """
+    Перечень паспортов (до prepare_passports) к спецификации: паспорта для доли coverage
+    компонентов, часть наименований записана иначе (префикс «ОСМ», лишние пробелы),
+    у некоторых компонентов несколько партий; extra - доля паспортов посторонних компонентов.
+    """
+    rng = random.Random(seed)
+    names = []
+    for name in specification.loc[specification['Поз.'].notna(), 'Наименование']:
+        if rng.random() >= coverage:
+            continue
+        variant = rng.random()
+        if variant < 0.1:
+            name = f"ОСМ {name}"
+        elif variant < 0.2:
+            name = name.replace(" ", "  ", 1)
+        names += [name] * rng.choice((1, 1, 1, 2))
+    names += [f"{rng.choice(COMPONENTS)} посторонний {i}" for i in range(int(len(names) * extra))]
+    rng.shuffle(names)
+    return pd.DataFrame({
+        'Наименование': names,
+        'Паспорт': [f"ПДРФ.{rng.choice(('28П23', '30П24', '31П24'))}-{i}" for i in range(1, len(names) + 1)],
+        'Дата': make_dates(len(names), seed).replace("nan", None),
+    })
+
+
+def write_passport_workbook(path, passports):
+    """Перечень паспортов в формате ekb_list_generator (лист 'Лист1') с заголовком."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Лист1')
+    worksheet.append(['Наименование', 'Паспорт', 'Дата'])
+    for row in passports.itertuples(index=False, name=None):
+        worksheet.append(row)
+    workbook.save(path)
+
+
+def write_specification_workbook(path, n_rows, n_sheets=5, seed=0):
+    """
+    Многолистовая книга спецификации как в конструкторской документации: над таблицей
+    строки титула, кроме 'Поз.', 'Наименование', 'Кол.' есть служебные столбцы.
+    Возвращает записанную спецификацию (make_board_specification).
+    """
+    from openpyxl import Workbook
+
+    specification = make_board_specification(n_rows, seed)
+    workbook = Workbook(write_only=True)
+    for number, sheet in enumerate(split_table(specification, n_sheets), start=1):
+        worksheet = workbook.create_sheet(f"Лист{number}")
+        worksheet.append(["Спецификация ЮМП.250.212.045"])
+        worksheet.append([])
+        worksheet.append(['Формат', 'Зона', 'Поз.', 'Обозначение', 'Наименование', 'Кол.', 'Примечание'])
+        for position, name, quantity in sheet.itertuples(index=False, name=None):
+            if position is None or pd.isna(position):
+                worksheet.append([None, None, None, None, name, None, None])
+                worksheet.append([])
+            else:
+                worksheet.append(['A4', None, int(position), f"ЮМП.{int(position):06d}", name, int(quantity), 'прим.'])
+    workbook.save(path)
+    return specification
+
+
+def split_table(table, parts):
+    """Деление таблицы на parts последовательных частей."""
+    size = -(-len(table) // parts)
+    return [table.iloc[start:start + size] for start in range(0, len(table), size)]
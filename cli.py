@@ -0,0 +1,327 @@
+"""
+Консольный (безоконный) режим формирования перечней ЭКБ для МП и МК.
+
+Пример:
+    python cli.py batch "specs/*.xlsx" --ekb "список паспартов ЭКБ.xlsx" --jobs 4
+    python cli.py batch spec.xlsx --ekb passports.db --docx --profile --profile-dump html
+    python cli.py project комплект.yaml --jobs 4 --incremental
+    python cli.py watch --docx
+    python cli.py render output/output_MP.feather --docx
+    python cli.py serve --ekb "список паспартов ЭКБ.xlsx" --jobs 2
+    python cli.py passports passports.db "список паспартов 28П23.xlsx" --conclusions "! Заключения 30П24.xlsx"
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+
+import yaml
+
+from backend import load_passports, process_specification, read_passport_list, render_document
+from ekb_list_generator import read_conclusions
+from passport_store import PassportStore
+from project import load_project, resolve_project_passports
+from service import DEFAULT_HOST, DEFAULT_JOBS, DEFAULT_PORT, run_service
+from profiling import NO_PROFILE, REPORT_NAME, PipelineProfile, format_report, profile_calls
+from watch import CONFIG_PATH, DEBOUNCE_SECONDS, WatchSession, read_config, watch_changes
+
+
+def collect_spec_files(patterns, exclude=()):
+    """
+    Собирает список файлов спецификаций по путям, папкам и glob-шаблонам.
+    Временные файлы Excel (~$...) и исключенные файлы (например, перечень ЭКБ) пропускаются.
+    """
+    excluded = {Path(p).resolve() for p in exclude}
+    files = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.glob("*.xlsx"))
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(pattern))
+        for candidate in candidates:
+            if candidate.name.startswith("~$") or candidate.resolve() in excluded:
+                continue
+            if candidate not in files:
+                files.append(candidate)
+    return files
+
+
+def describe_changes(output_path, pages, incremental):
+    """Описание результата для одного выходного файла: путь и измененные страницы."""
+    if not incremental:
+        return str(output_path)
+    if not pages:
+        return f"{output_path} (без изменений)"
+    return f"{output_path} (изменены листы: {', '.join(map(str, pages))})"
+
+
+def _process_one(spec_file, ekb_file, output_dir, make_mp, make_mk, incremental, profile=False, profile_dump=None,
+                 docx=False):
+    """
+    Обработка одной платы в рабочем процессе.
+    Возвращает (описания выходных файлов, время, ошибка, отчет профилирования или None).
+    С profile отчет по этапам сохраняется в output_dir/profile.json, с profile_dump
+    ("prof" или "html") там же сохраняется профиль по функциям.
+    """
+    start = time.perf_counter()
+    pipeline_profile = PipelineProfile() if profile else NO_PROFILE
+    calls = profile_calls(Path(output_dir) / f"profile.{profile_dump}") if profile_dump else nullcontext()
+    try:
+        with calls:
+            created = process_specification(spec_file, ekb_file, output_dir, make_mp=make_mp, make_mk=make_mk,
+                                            incremental=incremental, profile=pipeline_profile, docx=docx)
+        report = None
+        if profile:
+            pipeline_profile.stop()
+            pipeline_profile.save(Path(output_dir) / REPORT_NAME, spec_file=spec_file)
+            report = pipeline_profile.to_dict()
+        described = [describe_changes(path, pages, incremental) for path, pages in created.items()]
+        return described, time.perf_counter() - start, None, report
+    except Exception as exc:
+        if profile:
+            pipeline_profile.stop()
+        return [], time.perf_counter() - start, f"{type(exc).__name__}: {exc}", None
+
+
+def _run_pool(tasks, jobs):
+    """
+    Выполнение задач {название: аргументы _process_one} в пуле процессов с выводом
+    результатов по мере готовности. Возвращает число ошибок.
+    """
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_process_one, *task): name for name, task in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            created, elapsed, error, report = future.result()
+            if error:
+                failed += 1
+                print(f"[ОШИБКА] {name}: {error} ({elapsed:.2f} с)")
+            else:
+                print(f"[OK] {name}: {elapsed:.2f} с -> {', '.join(created)}")
+            if report:
+                print(format_report(report))
+    return failed
+
+
+def run_batch(args):
+    """Пакетная обработка спецификаций в пуле процессов."""
+    spec_files = collect_spec_files(args.specs, exclude=[args.ekb])
+    if not spec_files:
+        print("Не найдено ни одного файла спецификации.")
+        return 1
+
+    make_mp = not args.no_mp
+    make_mk = not args.no_mk
+    jobs = args.jobs or min(len(spec_files), os.cpu_count() or 1)
+    print(f"Спецификаций: {len(spec_files)}, процессов: {jobs}")
+
+    start = time.perf_counter()
+    # Разбираем перечень ЭКБ один раз до запуска пула: процессы возьмут его из кэша
+    load_passports(args.ekb)
+    print(f"Перечень ЭКБ подготовлен: {time.perf_counter() - start:.2f} с")
+
+    tasks = {}
+    for spec_file in spec_files:
+        # Для каждой платы своя папка, чтобы выходные файлы не перезаписывали друг друга
+        output_dir = Path(args.output_dir) / spec_file.stem if args.output_dir else spec_file.parent / "output" / spec_file.stem
+        tasks[spec_file.name] = (str(spec_file), args.ekb, str(output_dir), make_mp, make_mk, args.incremental,
+                                 args.profile, args.profile_dump, args.docx)
+    failed = _run_pool(tasks, jobs)
+
+    total = time.perf_counter() - start
+    print(f"Готово: {len(spec_files) - failed} из {len(spec_files)} успешно, ошибок: {failed}, общее время: {total:.2f} с")
+    return 1 if failed else 0
+
+
+def run_project(args):
+    """Формирование МП и МК для всех (или выбранных) плат проекта."""
+    try:
+        project = load_project(args.project)
+        boards = project.select(args.boards)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        print(f"Ошибка в проекте {args.project}: {exc}")
+        return 1
+
+    missing = [str(board.spec) for board in boards if not board.spec.exists()]
+    if missing:
+        print(f"Не найдены спецификации: {', '.join(missing)}")
+        return 1
+
+    jobs = args.jobs or min(len(boards), os.cpu_count() or 1)
+    print(f"Проект {project.path.name}: плат {len(boards)}, процессов: {jobs}")
+
+    start = time.perf_counter()
+    # Общие источники паспортов разбираются один раз до запуска пула
+    passports = resolve_project_passports(project, boards)
+    print(f"Паспорта подготовлены: {time.perf_counter() - start:.2f} с")
+
+    tasks = {
+        board.name: (str(board.spec), str(passports[board.name]), str(board.output_dir), board.make_mp, board.make_mk,
+                     args.incremental, args.profile, args.profile_dump, board.docx or args.docx)
+        for board in boards
+    }
+    failed = _run_pool(tasks, jobs)
+
+    total = time.perf_counter() - start
+    print(f"Готово: {len(boards) - failed} из {len(boards)} успешно, ошибок: {failed}, общее время: {total:.2f} с")
+    return 1 if failed else 0
+
+
+def run_watch(args):
+    """Повторное формирование МП и МК при сохранении спецификации или перечня ЭКБ."""
+    spec_file, ekb_file = args.spec, args.ekb
+    if not spec_file or not ekb_file:
+        if not CONFIG_PATH.exists():
+            print(f"Укажите --spec и --ekb: файл настроек {CONFIG_PATH.name} не найден.")
+            return 1
+        config_spec, config_ekb = read_config()
+        spec_file, ekb_file = spec_file or config_spec, ekb_file or config_ekb
+
+    session = WatchSession(spec_file, ekb_file, args.output_dir, make_mp=not args.no_mp, make_mk=not args.no_mk,
+                           docx=args.docx)
+    print(f"Наблюдение: {spec_file}, {ekb_file} (Ctrl+C - выход)")
+    changes = watch_changes(session.paths, debounce=args.debounce)
+    _run_session(session)
+    try:
+        for changed in changes:
+            print(f"Изменены: {', '.join(sorted(path.name for path in changed))}")
+            _run_session(session)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _run_session(session):
+    """Один запуск WatchSession с выводом результата; ошибки не прерывают наблюдение."""
+    start = time.perf_counter()
+    try:
+        created = session.run()
+    except Exception as exc:
+        print(f"[ОШИБКА] {type(exc).__name__}: {exc}")
+        return
+    described = [describe_changes(path, pages, incremental=True) for path, pages in created.items()]
+    print(f"[OK] {time.perf_counter() - start:.2f} с -> {', '.join(described) or 'без изменений'}")
+
+
+def run_render(args):
+    """Формирование выходных файлов из сохраненных документов без повторной обработки."""
+    failed = 0
+    for path in map(Path, args.documents):
+        start = time.perf_counter()
+        try:
+            created = render_document(path, docx=args.docx)
+        except Exception as exc:
+            failed += 1
+            print(f"[ОШИБКА] {path.name}: {type(exc).__name__}: {exc}")
+            continue
+        print(f"[OK] {path.name}: {time.perf_counter() - start:.2f} с -> {', '.join(map(str, created))}")
+    return 1 if failed else 0
+
+
+def run_serve(args):
+    """Локальный HTTP-сервис формирования МП и МК с перечнем паспортов в памяти."""
+    try:
+        run_service(args.ekb, args.host, args.port, args.jobs)
+    except ImportError as exc:
+        print(exc)
+        return 1
+    return 0
+
+
+def run_passports(args):
+    """Загрузка перечней паспортов и файлов «Заключения» в базу паспортов."""
+    store = PassportStore(args.db)
+    for pattern in args.lists:
+        for path in collect_spec_files([pattern]):
+            added = store.add(read_passport_list(path), source=path.name)
+            print(f"{path.name}: добавлено {added}")
+    for pattern in args.conclusions:
+        for path in collect_spec_files([pattern]):
+            added = store.add(read_conclusions(path), source=path.name)
+            print(f"{path.name}: добавлено {added}")
+
+    print(f"В базе {args.db}: {len(store)} паспортов")
+    for source, count in store.sources().items():
+        print(f"  {source}: {count}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Формирование перечней ЭКБ для МП и МК без графического интерфейса.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Пакетная обработка спецификаций")
+    batch.add_argument("specs", nargs="+", help="Файлы, папки или glob-шаблоны спецификаций (*.xlsx)")
+    batch.add_argument("--ekb", required=True, help="Файл перечня ЭКБ (список паспортов) или база паспортов (*.db)")
+    batch.add_argument("--output-dir", help="Папка для результатов (по умолчанию output рядом со спецификацией)")
+    batch.add_argument("--jobs", type=int, default=0, help="Число рабочих процессов (по умолчанию по числу ядер)")
+    batch.add_argument("--no-mp", action="store_true", help="Не формировать output_MP.xlsx")
+    batch.add_argument("--no-mk", action="store_true", help="Не формировать output_MK.xlsx")
+    batch.add_argument("--incremental", action="store_true",
+                       help="Перезаписывать файлы только при изменении содержимого и выводить измененные листы")
+    batch.add_argument("--docx", action="store_true",
+                       help="Сохранять рядом с книгами документы DOCX с таблицами по форме МП/МК")
+    batch.add_argument("--profile", action="store_true",
+                       help="Замерять время, строки и пиковую память этапов; отчет - в profile.json рядом с результатами")
+    batch.add_argument("--profile-dump", choices=("prof", "html"),
+                       help="Сохранить профиль по функциям: cProfile (prof) или pyinstrument (html)")
+    batch.set_defaults(func=run_batch)
+
+    project = subparsers.add_parser("project", help="Формирование МП и МК для всех плат проекта (*.yaml)")
+    project.add_argument("project", help="Файл проекта со списком плат (см. project.py)")
+    project.add_argument("--boards", nargs="+", default=[], help="Обработать только платы с указанными именами")
+    project.add_argument("--jobs", type=int, default=0, help="Число рабочих процессов (по умолчанию по числу ядер)")
+    project.add_argument("--incremental", action="store_true",
+                         help="Перезаписывать файлы только при изменении содержимого и выводить измененные листы")
+    project.add_argument("--docx", action="store_true", help="Сохранять документы DOCX для всех плат")
+    project.add_argument("--profile", action="store_true", help="Замерять этапы обработки (см. batch --profile)")
+    project.add_argument("--profile-dump", choices=("prof", "html"), help="Сохранить профиль по функциям")
+    project.set_defaults(func=run_project)
+
+    watch = subparsers.add_parser("watch", help="Формирование МП и МК заново при сохранении входных файлов")
+    watch.add_argument("--spec", help="Файл спецификации (по умолчанию из spec_path_config.yaml)")
+    watch.add_argument("--ekb", help="Перечень ЭКБ или база паспортов (по умолчанию из spec_path_config.yaml)")
+    watch.add_argument("--output-dir", help="Папка для результатов (по умолчанию output рядом со спецификацией)")
+    watch.add_argument("--no-mp", action="store_true", help="Не формировать output_MP.xlsx")
+    watch.add_argument("--no-mk", action="store_true", help="Не формировать output_MK.xlsx")
+    watch.add_argument("--docx", action="store_true", help="Сохранять рядом с книгами документы DOCX")
+    watch.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                       help="Пауза после сохранения перед обработкой, с")
+    watch.set_defaults(func=run_watch)
+
+    render = subparsers.add_parser("render", help="Формирование МП и МК из сохраненных документов")
+    render.add_argument("documents", nargs="+",
+                        help="Документы рядом с результатами (output_MP.feather или output_MP.document.pkl)")
+    render.add_argument("--docx", action="store_true", help="Сохранять рядом с книгами документы DOCX")
+    render.set_defaults(func=run_render)
+
+    serve = subparsers.add_parser("serve", help="Локальный HTTP-сервис формирования МП и МК (см. service.py)")
+    serve.add_argument("--ekb", required=True, help="Файл перечня ЭКБ (список паспортов) или база паспортов (*.db)")
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"Адрес сервиса (по умолчанию {DEFAULT_HOST}); у сервиса нет проверки доступа, "
+                            "другой адрес - только в доверенной сети")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Порт сервиса (по умолчанию {DEFAULT_PORT})")
+    serve.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                       help=f"Число рабочих процессов (по умолчанию {DEFAULT_JOBS})")
+    serve.set_defaults(func=run_serve)
+
+    passports = subparsers.add_parser("passports", help="Загрузка паспортов в базу (*.db)")
+    passports.add_argument("db", help="Файл базы паспортов (создается при отсутствии)")
+    passports.add_argument("lists", nargs="*", help="Перечни паспортов ЭКБ (*.xlsx, папки или glob-шаблоны)")
+    passports.add_argument("--conclusions", nargs="+", default=[], help="Файлы «Заключения» (*.xlsx)")
+    passports.set_defaults(func=run_passports)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Колоночное промежуточное представление документа (МП, МК) перед разбиением на страницы.
+
+Таблица документа - DataFrame с типизированными столбцами: текстовые столбцы хранятся
+как category (наименования, разделы, паспорта и даты повторяются), числовые - как
+Int64 или Float64; пустые ячейки - NA. Индекс - номер исходной записи (см. layout.paginate).
+Запись Excel и DOCX, хэши страниц и разбиение на страницы работают с этой таблицей.
+
+Документ можно сохранить в Feather (если установлен pyarrow) или pickle и затем
+сформировать выходные файлы заново без повторного объединения с перечнем ЭКБ
+(backend.render_document).
+"""
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow не установлен - документ сохраняется в pickle
+    pa = None
+
+# Версия формата документа: увеличить при изменении состава или типов столбцов
+DOCUMENT_VERSION = 1
+FEATHER_SUFFIX = ".feather"
+PICKLE_SUFFIX = ".document.pkl"
+# Столбец с номером исходной записи (индекс таблицы) в файле Feather
+_RECORD_COLUMN = "_record"
+
+
+def _typed_column(values):
+    """Столбец в колоночном виде; столбцы со смесью чисел и текста не меняются."""
+    empty = values.isna() | values.eq("")
+    kind = infer_dtype(values[~empty], skipna=True)
+    if kind in ("string", "empty"):
+        return values.where(~empty).astype("category")
+    if kind in ("integer", "floating", "mixed-integer-float"):
+        numbers = pd.to_numeric(values.where(~empty))
+        whole = numbers.dropna().mod(1).eq(0).all()
+        return numbers.astype("Int64" if whole else "Float64")
+    return values
+
+
+def as_document(table):
+    """Таблица документа с типизированными столбцами (индекс сохраняется)."""
+    # Индекс с повторами (перенесенные наименования) не выравнивается, поэтому передаются массивы столбцов
+    return pd.DataFrame({column: _typed_column(table[column]).array for column in table.columns}, index=table.index)
+
+
+def document_path(output_path):
+    """Путь к файлу документа рядом с выходным файлом (Feather или pickle)."""
+    output_path = Path(output_path)
+    if pa is not None:
+        return output_path.with_suffix(FEATHER_SUFFIX)
+    return output_path.with_suffix(PICKLE_SUFFIX)
+
+
+def output_for_document(path):
+    """Выходной файл Excel, рядом с которым сохранен документ."""
+    path = Path(path)
+    if path.name.endswith(PICKLE_SUFFIX):
+        return path.with_name(path.name[:-len(PICKLE_SUFFIX)] + ".xlsx")
+    return path.with_suffix(".xlsx")
+
+
+def save_document(table, profile_name, path):
+    """Сохранение таблицы документа и имени профиля страницы (МП или МК)."""
+    path = Path(path)
+    if path.suffix == FEATHER_SUFFIX:
+        arrow_table = pa.Table.from_pandas(table.rename_axis(_RECORD_COLUMN).reset_index(), preserve_index=False)
+        metadata = {**(arrow_table.schema.metadata or {}),
+                    b"profile": profile_name.encode("utf-8"), b"version": str(DOCUMENT_VERSION).encode()}
+        feather.write_feather(arrow_table.replace_schema_metadata(metadata), path)
+    else:
+        pd.to_pickle({"version": DOCUMENT_VERSION, "profile": profile_name, "table": table}, path)
+
+
+def load_document(path):
+    """Таблица документа и имя профиля страницы из файла save_document."""
+    path = Path(path)
+    if path.suffix == FEATHER_SUFFIX:
+        if pa is None:
+            raise ImportError("Для чтения документа Feather нужен pyarrow")
+        arrow_table = feather.read_table(path)
+        metadata = arrow_table.schema.metadata or {}
+        version, profile_name = int(metadata.get(b"version", 0)), metadata.get(b"profile", b"").decode("utf-8")
+        table = arrow_table.to_pandas().set_index(_RECORD_COLUMN).rename_axis(None)
+    else:
+        document = pd.read_pickle(path)
+        version, profile_name, table = document["version"], document["profile"], document["table"]
+    if version != DOCUMENT_VERSION:
+        raise ValueError(f"Документ {path.name} сохранен в другой версии формата ({version})")
+    return table, profile_name
@@ -0,0 +1,154 @@
+"""
+Перечни ЭКБ для МП и МК в виде готового документа DOCX.
+
+Шаблоны МП и МК в папке «Шаблон МК и МП» хранятся в двоичном формате Visio (.vsd),
+который нельзя изменить без Visio. Поэтому документ формируется в формате DOCX
+(WordprocessingML, только стандартная библиотека): каждая страница перечня - таблица
+на отдельной странице с геометрией профиля (PageProfile): пропорции столбцов,
+число строк на странице, шрифты и выравнивание именованных стилей. Страницы берутся
+из того же разбиения (layout.table_pages), что и листы Excel, и записываются за один проход.
+"""
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from layout import excel_value
+
+# Размер страницы и поля в миллиметрах (A4, альбомная ориентация)
+PAGE_SIZE_MM = (297, 210)
+PAGE_MARGIN_MM = 10
+# Ширина столбца Excel по умолчанию в пикселях (для профилей без column_widths)
+DEFAULT_COLUMN_WIDTH_PX = 64
+DEFAULT_FONT_SIZE = 11
+# Высота служебного абзаца между таблицами (разрыв страницы), twips
+_SEPARATOR_HEIGHT = 20
+
+_TWIPS_PER_MM = 1440 / 25.4
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCUMENT_START = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+
+_BORDERS = "".join(f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="000000"/>'
+                   for side in ("top", "left", "bottom", "right", "insideH", "insideV"))
+
+
+def docx_path(output_path):
+    """Путь к документу DOCX рядом с выходным файлом Excel."""
+    return Path(output_path).with_suffix(".docx")
+
+
+def _twips(mm):
+    return int(round(mm * _TWIPS_PER_MM))
+
+
+def _text(value):
+    value = excel_value(value)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _style_properties(profile):
+    """Свойства абзаца и текста (XML) для каждого именованного стиля профиля."""
+    properties = {None: ("", f'<w:sz w:val="{DEFAULT_FONT_SIZE * 2}"/>')}
+    for name, attributes in profile.styles.items():
+        font = attributes.get("font")
+        alignment = attributes.get("alignment")
+        size = font.size if font is not None and font.size else DEFAULT_FONT_SIZE
+        run = ("<w:b/>" if font is not None and font.b else "") + ("<w:i/>" if font is not None and font.i else "")
+        run += f'<w:sz w:val="{int(size * 2)}"/>'
+        paragraph = '<w:jc w:val="center"/>' if alignment is not None and alignment.horizontal == "center" else ""
+        properties[name] = (paragraph, run)
+    return properties
+
+
+class _Geometry:
+    """Ширина столбцов и высота строк таблицы страницы в twips."""
+
+    def __init__(self, profile, n_columns):
+        width_mm, height_mm = PAGE_SIZE_MM
+        widths = list(profile.column_widths or ())
+        widths += [DEFAULT_COLUMN_WIDTH_PX] * (n_columns - len(widths))
+        # Пропорции столбцов как на листе Excel, таблица - на всю ширину страницы
+        usable_width = _twips(width_mm - 2 * PAGE_MARGIN_MM)
+        self.columns = [int(usable_width * width / sum(widths)) for width in widths]
+        usable_height = _twips(height_mm - 2 * PAGE_MARGIN_MM) - 2 * _SEPARATOR_HEIGHT
+        self.row_height = usable_height // profile.rows_per_page
+        self.page = (_twips(width_mm), _twips(height_mm))
+        self.margin = _twips(PAGE_MARGIN_MM)
+
+
+def _cell(text, width, style):
+    paragraph, run = style
+    content = f'<w:r><w:rPr>{run}</w:rPr><w:t xml:space="preserve">{escape(text)}</w:t></w:r>' if text else ""
+    return (f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/><w:vAlign w:val="center"/></w:tcPr>'
+            f'<w:p><w:pPr><w:spacing w:before="0" w:after="0"/>{paragraph}</w:pPr>{content}</w:p></w:tc>')
+
+
+def _separator(page_break):
+    """Служебный абзац минимальной высоты после таблицы (с разрывом страницы перед следующей)."""
+    properties = '<w:pageBreakBefore/>' if page_break else ''
+    return (f'<w:p><w:pPr>{properties}<w:spacing w:before="0" w:after="0" w:line="{_SEPARATOR_HEIGHT}" '
+            f'w:lineRule="exact"/><w:rPr><w:sz w:val="2"/></w:rPr></w:pPr></w:p>')
+
+
+def write_docx(table, pages, profile, output_path, sections):
+    """
+    Запись страниц таблицы в документ DOCX: страница pages[i] - таблица на отдельной
+    странице из profile.rows_per_page строк (недостающие строки остаются пустыми);
+    sections - ячейки разделов (layout.section_cells).
+    Служебные пустые ячейки листа Excel (profile.trailing_cells) в документ не записываются.
+    """
+    geometry = _Geometry(profile, len(table.columns))
+    styles = _style_properties(profile)
+    rows = table.itertuples(index=False, name=None)
+    empty_row = ("",) * len(table.columns)
+
+    grid = "".join(f'<w:gridCol w:w="{width}"/>' for width in geometry.columns)
+    table_start = (f'<w:tbl><w:tblPr><w:tblW w:w="{sum(geometry.columns)}" w:type="dxa"/>'
+                   f'<w:tblLayout w:type="fixed"/><w:tblBorders>{_BORDERS}</w:tblBorders>'
+                   f'<w:tblCellMar><w:left w:w="40" w:type="dxa"/><w:right w:w="40" w:type="dxa"/></w:tblCellMar>'
+                   f'</w:tblPr><w:tblGrid>{grid}</w:tblGrid>')
+    row_start = f'<w:tr><w:trPr><w:cantSplit/><w:trHeight w:val="{geometry.row_height}" w:hRule="exact"/></w:trPr>'
+
+    parts = [_DOCUMENT_START]
+    for page_number, (start, stop) in enumerate(pages):
+        if page_number:
+            parts.append(_separator(page_break=True))
+        parts.append(table_start)
+        for line in range(profile.rows_per_page):
+            row = next(rows) if line < stop - start else empty_row
+            row_sections = sections[start + line] if line < stop - start else [False] * len(row)
+            cells = [
+                _cell(_text(value), geometry.columns[column], styles[profile.cell_style(column, value, row_sections[column], line)])
+                for column, value in enumerate(map(excel_value, row))
+            ]
+            parts.append(row_start + "".join(cells) + "</w:tr>")
+        parts.append("</w:tbl>")
+    parts.append(_separator(page_break=False))
+
+    page_width, page_height = geometry.page
+    parts.append(
+        f'<w:sectPr><w:pgSz w:w="{page_width}" w:h="{page_height}" w:orient="landscape"/>'
+        f'<w:pgMar w:top="{geometry.margin}" w:right="{geometry.margin}" w:bottom="{geometry.margin}" '
+        f'w:left="{geometry.margin}" w:header="0" w:footer="0" w:gutter="0"/></w:sectPr></w:body></w:document>'
+    )
+
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _RELS)
+        docx.writestr("word/document.xml", "".join(parts))
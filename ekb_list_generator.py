@@ -1,14 +1,37 @@
 import pandas as pd
+import argparse
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
 from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
 
+# Регулярные выражения компилируются один раз при импорте модуля
+OSM_PREFIX_RE = re.compile(r'^ОСМ\s+')
+RESISTOR_RE = re.compile(r'Р(\d+-\d+)\s+(.*?)(\d+\.?\d*)\s*([кОмМк]?Ом?)\b')
+CAPACITOR_TYPE_RE = re.compile(r'^К\d+-\d+')
+CAPACITOR_UNIT_TAIL_RE = re.compile(r'([мкнп]Ф\s*).*', flags=re.IGNORECASE)
+TOLERANCE_RE = re.compile(r'\s*[±+].*')
+MARKING_RE = re.compile(r'\s*[МПН]\d*\b')
+CAPACITOR_RE = re.compile(
+    r'(К\d+-\d+)\s+(\d+\s*В\s+)?(\d+[,.]?\d*)\s*([мкнп]?Ф?)\s*(\d+\s*В)?',
+    flags=re.IGNORECASE
+)
+NON_DIGIT_RE = re.compile(r'\D')
+SPACES_RE = re.compile(r'\s+')
+PASSPORT_PREFIX_RE = re.compile(r'(\d{2,3}[ПИ]\d{2,3})')
+YEAR_RE = re.compile(r'(\d{4})')
+
+# Одни и те же наименования и даты повторяются во всех заключениях
+@lru_cache(maxsize=65536)
 def simplify_component_name(name):
     # Удаляем "ОСМ" в начале, если есть
-    name = re.sub(r'^ОСМ\s+', '', name.strip())
-    
+    name = OSM_PREFIX_RE.sub('', name.strip())
+
     if name.startswith('Р'):
-        match = re.match(r'Р(\d+-\d+)\s+(.*?)(\d+\.?\d*)\s*([кОмМк]?Ом?)\b', name)
+        match = RESISTOR_RE.match(name)
         if match:
             base, _, value, unit = match.groups()
             unit = unit.replace('Ом', '').strip()
@@ -23,32 +46,28 @@ def simplify_component_name(name):
             else:
                 value = f"{value}"
             return f"Р{base} {value}"
-    
+
     # Обработка конденсаторов (начинающихся на К)
-    elif re.match(r'^К\d+-\d+', name):
+    elif CAPACITOR_TYPE_RE.match(name):
         # Удаляем все технические пометки после ёмкости
-        name = re.sub(r'([мкнп]Ф\s*).*', r'\1', name, flags=re.IGNORECASE)
-        name = re.sub(r'\s*[±+].*', '', name)  # Удаляем допуски ±
-        name = re.sub(r'\s*[МПН]\d*\b', '', name)  # Удаляем маркировки типа МП0, Н90
-        
+        name = CAPACITOR_UNIT_TAIL_RE.sub(r'\1', name)
+        name = TOLERANCE_RE.sub('', name)  # Удаляем допуски ±
+        name = MARKING_RE.sub('', name)  # Удаляем маркировки типа МП0, Н90
+
         # Паттерн для конденсаторов с напряжением
-        match = re.match(
-            r'(К\d+-\d+)\s+(\d+\s*В\s+)?(\d+[,.]?\d*)\s*([мкнп]?Ф?)\s*(\d+\s*В)?', 
-            name, 
-            flags=re.IGNORECASE
-        )
+        match = CAPACITOR_RE.match(name)
         if match:
             base, volt_prefix, value, unit, volt_suffix = match.groups()
             value = value.replace(',', '.')
             unit = (unit or '').lower()
-            
+
             # Определяем напряжение
             voltage = ''
             if volt_prefix:
-                voltage = re.sub(r'\D', '', volt_prefix)
+                voltage = NON_DIGIT_RE.sub('', volt_prefix)
             elif volt_suffix:
-                voltage = re.sub(r'\D', '', volt_suffix)
-            
+                voltage = NON_DIGIT_RE.sub('', volt_suffix)
+
             # Форматируем выходную строку
             result = base
             if value:
@@ -56,79 +75,167 @@ def simplify_component_name(name):
                 result += f" {value}{unit}Ф" if unit else f" {value}"
             if voltage:
                 result += f" {voltage}В"
-            
+
             # Удаляем возможные двойные пробелы
-            return re.sub(r'\s+', ' ', result).strip()
-        
+            return SPACES_RE.sub(' ', result).strip()
+
         return name.split('(')[0].strip()
-    
+
     # Для остальных типов оставляем как есть
     return name.split('(')[0].strip()
 
-def convert_conclusions_to_passports(input_file, output_file):
-    # Извлекаем номер паспорта из названия файла
-    passport_prefix = re.search(r'(\d{2,3}[ПИ]\d{2,3})', input_file)
+@lru_cache(maxsize=65536)
+def conclusion_component_name(type_and_lot):
+    """Наименование компонента из графы «Тип изделия (номер партии)»."""
+    original_name = type_and_lot.split('(')[0].strip()
+    original_name = original_name.replace('ОСМ', '').strip()
+    # Упрощаем название компонента
+    return simplify_component_name(original_name)
+
+def full_year(year):
+    """
+    Год даты четырьмя цифрами: двузначный год - текущего века, а если такой год
+    еще не наступил, то прошлого ("23" -> "2023", "98" -> "1998"). Остальные значения не меняются.
+    """
+    if len(year) != 2 or not year.isdigit():
+        return year
+    century = 2000 if int(year) <= date.today().year % 100 else 1900
+    return str(century + int(year))
+
+@lru_cache(maxsize=4096)
+def conclusion_manufacture_date(value):
+    """Дата изготовления из заключения в формате "ММ.ГГГГ" (как в перечне паспортов)."""
+    manufacture_date = str(value)
+    if 'нед.' in manufacture_date:
+        year = YEAR_RE.search(manufacture_date).group(1)
+        week = YEAR_RE.sub('', manufacture_date.split('нед.')[1]).strip()
+        manufacture_date = f"{week}.{year}"
+    elif 'пер.' in manufacture_date:
+        manufacture_date = manufacture_date.split('пер.')[-1].strip()
+
+    # Приводим дату к формату "ММ.ГГГГ": двузначный год дополняется веком
+    if '.' in manufacture_date:
+        parts = manufacture_date.split('.')
+        if len(parts) >= 2:
+            month = parts[0].strip().zfill(2)
+            year = full_year(parts[1].strip())
+            manufacture_date = f"{month}.{year}"
+    return manufacture_date
+
+def passport_prefix_from_filename(input_file):
+    """Номер партии паспортов (например, 28П23) из имени файла заключений."""
+    passport_prefix = PASSPORT_PREFIX_RE.search(Path(input_file).name)
     if passport_prefix:
-        passport_prefix = passport_prefix.group(1)
-    else:
-        passport_prefix = "XXПXX"
-    
+        return passport_prefix.group(1)
+    return "XXПXX"
+
+def read_conclusions(input_file):
+    """
+    Чтение файла «Заключения» в таблицу паспортов
+    со столбцами 'Тип изделия', 'Паспорт', 'Дата изготовления'.
+    """
+    passport_prefix = passport_prefix_from_filename(input_file)
+
     # Чтение исходного файла
     df = pd.read_excel(input_file)
-    
-    # Создаем новый DataFrame для результата
-    result_data = []
-    
-    # Обрабатываем каждую строку исходного файла
-    for index, row in df.iterrows():
-        # Получаем исходное название
-        original_name = row['Тип изделия (номер партии)'].split('(')[0].strip()
-        original_name = original_name.replace('ОСМ', '').strip()
-        # Упрощаем название компонента
-        simplified_name = simplify_component_name(original_name)
-        
-        # Формируем номер паспорта
-        passport_number = f"ПДРФ.{passport_prefix}-{row['№']}"
-        
-        # Обрабатываем дату изготовления
-        manufacture_date = str(row['Дата изготовления'])
-        if 'нед.' in manufacture_date:
-            year = re.search(r'(\d{4})', manufacture_date).group(1)[-2:]
-            manufacture_date = f"{manufacture_date.split('нед.')[1].strip()}.{year}"
-        elif 'пер.' in manufacture_date:
-            manufacture_date = manufacture_date.split('пер.')[-1].strip()
-        
-        # Упрощаем дату до формата "М.ГГГГ" или "М.ГГ"
-        if '.' in manufacture_date:
-            parts = manufacture_date.split('.')
-            if len(parts) >= 2:
-                month = parts[0]
-                year = parts[1][-2:] if len(parts[1]) > 2 else parts[1]
-                manufacture_date = f"{month}.{year}"
-        
-        # Добавляем данные в результат
-        result_data.append([simplified_name, passport_number, manufacture_date])
-    
-    # Создаем DataFrame из собранных данных
-    result = pd.DataFrame(result_data, columns=['Тип изделия', 'Паспорт', 'Дата изготовления'])
-    
+
+    # Наименования и даты повторяются, поэтому разбираются через кэш, а не построчно
+    return pd.DataFrame({
+        'Тип изделия': df['Тип изделия (номер партии)'].map(conclusion_component_name),
+        'Паспорт': f"ПДРФ.{passport_prefix}-" + df['№'].astype(str),
+        'Дата изготовления': df['Дата изготовления'].map(conclusion_manufacture_date),
+    })
+
+def create_passport_workbook():
+    """Книга перечня паспортов для потоковой записи (лист 'Лист1', без заголовка)."""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Лист1')
+
+    # Настраиваем ширину столбцов
+    worksheet.column_dimensions['A'].width = 25
+    worksheet.column_dimensions['B'].width = 25
+    worksheet.column_dimensions['C'].width = 15
+    return workbook, worksheet
+
+def add_to_store(store, input_file, result):
+    """Добавление паспортов из заключения в базу паспортов (passport_store.PassportStore)."""
+    added = store.add(result, source=Path(input_file).name)
+    print(f"{input_file}: в базу {store.path} добавлено {added} паспортов")
+
+def convert_conclusions_to_passports(input_file, output_file, store=None):
+    """
+    Преобразование одного файла «Заключения» в перечень паспортов.
+    Если передана база паспортов store, паспорта добавляются и в нее.
+    """
+    result = read_conclusions(input_file)
+    if store is not None:
+        add_to_store(store, input_file, result)
+    if output_file is None:
+        return
+
     # Сохраняем результат в новый файл Excel
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        result.to_excel(writer, index=False, header=False, sheet_name='Лист1')
-        
-        # Настраиваем ширину столбцов
-        workbook = writer.book
-        worksheet = writer.sheets['Лист1']
-        
-        worksheet.column_dimensions['A'].width = 25
-        worksheet.column_dimensions['B'].width = 25
-        worksheet.column_dimensions['C'].width = 15
+    workbook, worksheet = create_passport_workbook()
+    for row in result.itertuples(index=False, name=None):
+        worksheet.append(row)
+    workbook.save(output_file)
+
+    print(f"Файл успешно сохранен как {output_file}")
+
+def convert_many_conclusions(input_files, output_file, jobs=None, store=None):
+    """
+    Преобразование нескольких файлов «Заключения» (разных партий) в один перечень паспортов.
+    Файлы разбираются параллельно в рабочих процессах, строки записываются в книгу
+    по мере готовности (в порядке входных файлов) без повторов пары (наименование, паспорт).
+    Если передана база паспортов store, паспорта каждого файла добавляются и в нее.
+    Возвращает число записанных строк.
+    """
+    workbook, worksheet = create_passport_workbook()
+    seen = set()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for input_file, result in zip(input_files, pool.map(read_conclusions, input_files)):
+            if store is not None:
+                add_to_store(store, input_file, result)
+            if output_file is None:
+                continue
+            written = 0
+            for row in result.itertuples(index=False, name=None):
+                key = row[:2]
+                if key in seen:
+                    continue
+                seen.add(key)
+                worksheet.append(row)
+                written += 1
+            print(f"{input_file}: {len(result)} строк, добавлено {written}")
+    if output_file is None:
+        return 0
+    workbook.save(output_file)
 
     print(f"Файл успешно сохранен как {output_file}")
+    return len(seen)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Формирование перечня паспортов ЭКБ из файлов «Заключения».")
+    parser.add_argument("inputs", nargs="+", help="Файлы «Заключения» (*.xlsx)")
+    parser.add_argument("-o", "--output", help="Выходной файл перечня паспортов")
+    parser.add_argument("--db", help="База паспортов (*.db), в которую добавляются паспорта")
+    parser.add_argument("--jobs", type=int, default=None, help="Число рабочих процессов (по умолчанию по числу ядер)")
+    args = parser.parse_args(argv)
+    if not args.output and not args.db:
+        parser.error("укажите выходной файл -o и/или базу паспортов --db")
 
-# Использование функции
-input_filename = "/Users/vladk/dev/spec_mp_mk_bdk2/! Заключения 28П23.xlsx"
-output_filename = "/Users/vladk/dev/spec_mp_mk_bdk2/список паспартов 28П23v2.xlsx"
-convert_conclusions_to_passports(input_filename, output_filename)
+    store = None
+    if args.db:
+        from passport_store import PassportStore  # passport_store сам импортирует этот модуль через matching
+        store = PassportStore(args.db)
 
+    if len(args.inputs) == 1:
+        convert_conclusions_to_passports(args.inputs[0], args.output, store=store)
+    else:
+        convert_many_conclusions(args.inputs, args.output, jobs=args.jobs, store=store)
+    return 0
 
+# Использование функции:
+#   python ekb_list_generator.py "! Заключения 28П23.xlsx" "! Заключения 30П24.xlsx" -o "список паспартов ЭКБ.xlsx"
+#   python ekb_list_generator.py "! Заключения 28П23.xlsx" --db passports.db
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,31 @@
 import sys
 import os
+import importlib
 import subprocess
-import copy
+import threading
 import yaml
 from pathlib import Path
+from typing import TYPE_CHECKING
+from PyQt6.QtCore import QFileSystemWatcher, Qt, QThreadPool, QTimer
+from PyQt6.QtGui import QFontDatabase
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QFileDialog, QLabel, QMessageBox, QCheckBox)
-from backend import load_data, prepare_data, merge_data, create_result_table, \
-add_section_names, save_to_excel, filter_unwanted_sections, MK_creator, filter_unwanted_sections_MK
+                             QPushButton, QFileDialog, QLabel, QMessageBox, QCheckBox, QProgressBar,
+                             QPlainTextEdit, QToolButton)
+
+# Модуль обработки тянет pandas и openpyxl (сотни миллисекунд, а в EXE --onefile еще дольше),
+# поэтому он импортируется не при запуске, а в фоне после показа окна
+PROCESSING_MODULE = "worker"
+# Переменная окружения для замера запуска: окно закрывается сразу после показа
+STARTUP_BENCHMARK_ENV = "EKB_STARTUP_BENCHMARK"
+# Пауза после сохранения файла перед обработкой в режиме наблюдения, мс
+WATCH_DEBOUNCE_MS = 300
+
+if TYPE_CHECKING:
+    from worker import ProcessingWorker, ServiceWorker
+
+def warm_up_processing():
+    """Фоновый импорт модулей обработки, чтобы первая обработка не ждала загрузки pandas."""
+    threading.Thread(target=importlib.import_module, args=(PROCESSING_MODULE,), name="warm-up", daemon=True).start()
 
 class FileSelectionWindow(QWidget):
     def __init__(self):
@@ -18,11 +36,18 @@ class FileSelectionWindow(QWidget):
         self.output_path = ''
         self.spec_path: str = ""
         self.ekb_path: str = ""
+        self.worker: "ProcessingWorker | ServiceWorker | None" = None
+        self.service_url: str = ""  # адрес локального сервиса (service.py), по умолчанию service.DEFAULT_URL
+        self.inputs = None  # watch.PreparedInputs: подготовленные данные между запусками
+        self.watch_run = False
+        self.changed_files: set[str] = set()
         self.init_ui()
 
     def save_to_config(self) -> None:
         settings_path: Path = Path(__file__).parent.joinpath("spec_path_config.yaml")
         config_data: dict[str, float | int | str] = {"spec_path": str(Path().joinpath(self.spec_path)), "ekb_path": str(Path().joinpath(self.ekb_path))}
+        if self.service_url:
+            config_data["service_url"] = self.service_url
         if not settings_path.exists():
                 settings_path.touch()
         with open(str(settings_path), 'w', encoding='utf-8') as open_file:
@@ -40,6 +65,7 @@ class FileSelectionWindow(QWidget):
 
         self.spec_path = loaded_config_data.get("spec_path", "")
         self.ekb_path = loaded_config_data.get("ekb_path", "")
+        self.service_url = loaded_config_data.get("service_url", "")
         file.close()
 
     def init_ui(self):
@@ -56,18 +82,63 @@ class FileSelectionWindow(QWidget):
         self.process_button = QPushButton("Обработать данные")
         self.process_button.clicked.connect(self.process_data)
 
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.cancel_processing)
+        self.cancel_button.setEnabled(False)
+
+        # Индикатор хода обработки
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_label = QLabel("")
+
         # Чекбоксы для выбора типа выходных файлов
         self.mp_checkbox = QCheckBox("output_MP")
         self.mp_checkbox.setChecked(True)  # По умолчанию выбран
         self.mk_checkbox = QCheckBox("output_MK")
         self.mk_checkbox.setChecked(True)  # По умолчанию выбран
+        # Инкрементальный режим: файлы без изменений не перезаписываются и не открываются
+        self.incremental_checkbox = QCheckBox("Только изменения")
+        # Документы DOCX с таблицами по форме МП/МК рядом с книгами Excel
+        self.docx_checkbox = QCheckBox("DOCX")
+        # Режим наблюдения: обработка заново после сохранения спецификации или перечня ЭКБ
+        self.watch_checkbox = QCheckBox("Следить за файлами")
+        self.watch_checkbox.toggled.connect(self.toggle_watch)
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_file_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DEBOUNCE_MS)
+        self.watch_timer.timeout.connect(self.process_changes)
+        # Обработка локальным сервисом (cli.py serve) с перечнем паспортов в памяти; адрес - service_url в настройках
+        self.service_checkbox = QCheckBox("Через сервер")
+        # Замер этапов обработки (время, строки, память); отчет - в сворачиваемой панели
+        self.profile_checkbox = QCheckBox("Профилирование")
+
+        self.profile_toggle = QToolButton()
+        self.profile_toggle.setText("Профиль обработки")
+        self.profile_toggle.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.profile_toggle.setArrowType(Qt.ArrowType.RightArrow)
+        self.profile_toggle.setCheckable(True)
+        self.profile_toggle.setVisible(False)
+        self.profile_toggle.toggled.connect(self.toggle_profile_panel)
+        self.profile_panel = QPlainTextEdit()
+        self.profile_panel.setReadOnly(True)
+        self.profile_panel.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.profile_panel.setVisible(False)
 
         # Горизонтальный layout для чекбоксов и кнопки обработки
         process_layout = QHBoxLayout()
         process_layout.addWidget(self.mp_checkbox)
         process_layout.addWidget(self.mk_checkbox)
+        process_layout.addWidget(self.incremental_checkbox)
+        process_layout.addWidget(self.docx_checkbox)
+        process_layout.addWidget(self.watch_checkbox)
+        process_layout.addWidget(self.service_checkbox)
+        process_layout.addWidget(self.profile_checkbox)
         process_layout.addStretch()  # Добавляем растягиваемое пространство
         process_layout.addWidget(self.process_button)
+        process_layout.addWidget(self.cancel_button)
 
         # Метки для отображения путей
         self.spec_label = QLabel("Спецификация: Не выбрано!")
@@ -80,6 +151,10 @@ class FileSelectionWindow(QWidget):
         layout.addWidget(self.select_ekb_button)
         layout.addWidget(self.ekb_label)
         layout.addLayout(process_layout)  # Добавляем горизонтальный layout вместо кнопки
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
+        layout.addWidget(self.profile_toggle)
+        layout.addWidget(self.profile_panel)
 
         self.setLayout(layout)
         self.load_from_config()
@@ -94,7 +169,7 @@ class FileSelectionWindow(QWidget):
     def select_ekb_file(self):
         """Выбор файла ЭКБ."""
         file_dialog = QFileDialog(self)
-        self.ekb_file, _ = file_dialog.getOpenFileName(self, "Выберите файл перечня ЭКБ", str(Path().joinpath(self.ekb_path)), "Excel Files (*.xlsx)")
+        self.ekb_file, _ = file_dialog.getOpenFileName(self, "Выберите файл перечня ЭКБ", str(Path().joinpath(self.ekb_path)), "Перечень ЭКБ (*.xlsx *.db)")
         if self.ekb_file:
             self.ekb_label.setText(f"ЭКБ: {self.ekb_file}")
 
@@ -104,44 +179,145 @@ class FileSelectionWindow(QWidget):
             self.spec_path = self.spec_file
             self.ekb_path = self.ekb_file
             self.save_to_config()
+        if not self.spec_file or (not self.ekb_file and not self.service_checkbox.isChecked()):
+            self.spec_label.setText("Пожалуйста, выберите оба файла")
+            return
+        self.start_processing(self.mp_checkbox.isChecked(), self.mk_checkbox.isChecked())
+
+    def start_processing(self, make_mp, make_mk, watch_run=False):
+        """Запуск обработки в фоновом потоке (watch_run - запуск по изменению файлов)."""
+        # Обычно модуль уже загружен warm_up_processing; иначе импорт дождется его завершения
+        from service import DEFAULT_URL
+        from watch import PreparedInputs
+        from worker import ProcessingWorker, ServiceWorker
+
+        if self.inputs is None:
+            self.inputs = PreparedInputs()
+        self.watch_run = watch_run
+        # Обработка выполняется в фоновом потоке, окно остается отзывчивым
+        if self.service_checkbox.isChecked():
+            self.worker = ServiceWorker(
+                self.service_url or DEFAULT_URL, self.spec_file, Path(self.spec_file).parent/"output",
+                make_mp=make_mp, make_mk=make_mk, docx=self.docx_checkbox.isChecked()
+            )
+        else:
+            self.worker = ProcessingWorker(
+                self.spec_file, self.ekb_file, Path(self.spec_file).parent/"output",
+                make_mp=make_mp, make_mk=make_mk,
+                incremental=self.incremental_checkbox.isChecked() or watch_run, profile=self.profile_checkbox.isChecked(),
+                docx=self.docx_checkbox.isChecked(), inputs=self.inputs
+            )
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.failed.connect(self.on_failed)
+        self.worker.signals.cancelled.connect(self.on_cancelled)
+        self.worker.signals.profiled.connect(self.on_profiled)
+        self.set_processing(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def toggle_watch(self, enabled):
+        """Включение и выключение наблюдения за выбранными файлами."""
+        if not enabled:
+            self.watch_timer.stop()
+            self.changed_files.clear()
+            if self.file_watcher.files():
+                self.file_watcher.removePaths(self.file_watcher.files())
+            return
         if not self.spec_file or not self.ekb_file:
             self.spec_label.setText("Пожалуйста, выберите оба файла")
+            self.watch_checkbox.setChecked(False)
+            return
+        self.watch_files()
+        self.progress_label.setText("Наблюдение за файлами: обработка после сохранения")
+
+    def watch_files(self):
+        """Добавление файлов в наблюдение (после сохранения с подменой файла путь нужно добавить заново)."""
+        watched = set(self.file_watcher.files())
+        paths = [path for path in (self.spec_file, self.ekb_file) if path not in watched and Path(path).exists()]
+        if paths:
+            self.file_watcher.addPaths(paths)
+
+    def on_file_changed(self, path):
+        self.changed_files.add(path)
+        self.watch_files()
+        # Серия изменений при сохранении обрабатывается один раз после паузы
+        self.watch_timer.start()
+
+    def process_changes(self):
+        """Обработка по измененным файлам: при изменении только перечня ЭКБ МК не формируется."""
+        if self.worker:
+            self.watch_timer.start()  # дождемся окончания текущей обработки
+            return
+        self.watch_files()
+        changed, self.changed_files = self.changed_files, set()
+        make_mk = self.mk_checkbox.isChecked() and self.spec_file in changed
+        if self.mp_checkbox.isChecked() or make_mk:
+            self.start_processing(self.mp_checkbox.isChecked(), make_mk, watch_run=True)
+
+    def cancel_processing(self):
+        """Отмена текущей обработки."""
+        if self.worker:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.progress_label.setText("Отмена...")
+
+    def set_processing(self, running):
+        """Блокировка кнопок на время обработки."""
+        self.process_button.setEnabled(not running)
+        self.cancel_button.setEnabled(running)
+        if running:
+            self.progress_bar.setValue(0)
+
+    def on_progress(self, percent, stage):
+        self.progress_bar.setValue(percent)
+        self.progress_label.setText(stage)
+
+    def on_finished(self, created_files):
+        self.set_processing(False)
+        self.worker = None
+        # Открываем только файлы, в которых есть изменения
+        changed_files = {path: pages for path, pages in created_files.items() if pages}
+        if self.watch_run:
+            # В режиме наблюдения файлы не открываются при каждом сохранении
+            self.progress_label.setText("; ".join(
+                f"{Path(path).name}: изменены листы {', '.join(map(str, pages))}" for path, pages in changed_files.items()
+            ) or "Изменений нет")
             return
-        
-        try:
-            specification, passports = load_data(self.spec_file, self.ekb_file)
-            specification, passports = prepare_data(specification, passports)
-        except Exception:
-            self.spec_label.setText("Ошибка данных")
-            self.ekb_label.setText("Ошибка данных")
-        
-        # Создаем папку output, если ее нет
-        try:
-            os.mkdir(Path(self.spec_file).parent/"output")
-        except Exception:
-            pass
-
-        # Обработка для output_MP, если выбран соответствующий чекбокс
-        if self.mp_checkbox.isChecked():
-            specification_mp = copy.deepcopy(specification)
-            specification_mp = filter_unwanted_sections(specification_mp)
-            merged_data = merge_data(specification_mp, passports)
-            result = create_result_table(merged_data)
-            final_data = add_section_names(result, specification_mp)
-            
-            self.output_path = Path(self.spec_file).parent/"output/output_MP.xlsx"
-            save_to_excel(final_data, self.output_path)
-            self.spec_label.setText(f"Файл сохранен: {self.output_path}")
-            self.open_file(self.output_path)
-
-        # Обработка для output_MK, если выбран соответствующий чекбокс
-        if self.mk_checkbox.isChecked():
-            specification_mk = copy.deepcopy(specification)
-            specification_mk = filter_unwanted_sections_MK(specification_mk)
-            MK_creator_path = Path(self.spec_file).parent/"output/output_MK.xlsx"
-            MK_creator(self.spec_file, specification_mk, MK_creator_path, specification)
-            self.open_file(MK_creator_path)
-        
+        if not changed_files:
+            self.spec_label.setText("Изменений нет, файлы не перезаписаны")
+            return
+        if self.incremental_checkbox.isChecked():
+            self.progress_label.setText("; ".join(
+                f"{Path(path).name}: изменены листы {', '.join(map(str, pages))}" for path, pages in changed_files.items()
+            ))
+        self.spec_label.setText(f"Файл сохранен: {', '.join(str(path) for path in changed_files)}")
+        for file_path in changed_files:
+            self.open_file(file_path)
+
+    def on_profiled(self, report):
+        from profiling import format_report  # модуль обработки к этому моменту уже загружен
+
+        self.profile_panel.setPlainText(format_report(report))
+        self.profile_toggle.setVisible(True)
+
+    def toggle_profile_panel(self, expanded):
+        """Сворачивание и разворачивание панели профиля."""
+        self.profile_toggle.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        self.profile_panel.setVisible(expanded)
+
+    def on_failed(self, message):
+        self.set_processing(False)
+        self.worker = None
+        self.progress_label.setText(message)
+        self.spec_label.setText("Ошибка данных")
+        self.ekb_label.setText("Ошибка данных")
+
+    def on_cancelled(self):
+        self.set_processing(False)
+        self.worker = None
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Обработка отменена")
+
     def open_file(self, file_path):
         """Открытие выходного файла в системе."""
         if sys.platform == 'win32':  # Для Windows
@@ -153,8 +329,17 @@ class FileSelectionWindow(QWidget):
 
 def main():
     app = QApplication(sys.argv)
+    if os.environ.get(STARTUP_BENCHMARK_ENV):
+        # Замер времени запуска (benchmarks/bench_startup.py): окна, включая предупреждение
+        # об отсутствии конфигурации, закрываются при первой обработке событий
+        timer = QTimer(app)
+        timer.timeout.connect(app.closeAllWindows)
+        timer.timeout.connect(app.quit)
+        timer.start(0)
     window = FileSelectionWindow()
     window.show()
+    if not os.environ.get(STARTUP_BENCHMARK_ENV):
+        warm_up_processing()
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,155 @@
+"""
+Разбиение таблиц МП и МК на страницы и потоковая запись листов Excel.
+
+Формат документа задается профилем страницы PageProfile: число строк на странице,
+ширина столбцов, именованные стили и правило оформления ячеек. Разрывы страниц
+вычисляются за один проход с правилами «не разрывать»: строки одного наименования
+(перенесенного на несколько строк) остаются на одной странице, а заголовок раздела
+не остается последней строкой страницы и переносится вместе со следующим наименованием.
+Каждая страница записывается отдельным листом «ЛистN».
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle
+from openpyxl.utils import get_column_letter
+
+from sections import classify
+
+
+@dataclass(frozen=True)
+class PageProfile:
+    """Профиль страницы документа."""
+    name: str
+    rows_per_page: int
+    columns: tuple                   # столбцы таблицы в порядке записи
+    styles: dict                     # именованные стили {имя: атрибуты NamedStyle}
+    cell_style: Callable             # (столбец, значение, раздел, строка на странице) -> имя стиля или None
+    section_label: str               # метка sections.classify для строк разделов
+    section_columns: tuple           # столбцы, в которых ищутся названия разделов
+    column_widths: tuple = None      # ширина столбцов в пикселях (None - по умолчанию Excel)
+    trailing_cells: tuple = ()       # стили пустых ячеек после столбцов таблицы (None - ячейка без оформления)
+    wrap_width: float = None         # ширина переноса наименований в цифрах «0» (None - одной строкой)
+
+
+def register_named_styles(wb, styles):
+    """Регистрация именованных стилей в книге."""
+    for name, attributes in styles.items():
+        wb.add_named_style(NamedStyle(name=name, **attributes))
+
+
+def excel_value(value):
+    """Значение для записи в ячейку: пропуски pandas (NaN/NA) записываются пустой ячейкой."""
+    if value is None or isinstance(value, str):
+        return value
+    return None if pd.isna(value) else value
+
+
+def create_write_only_sheet(wb, title, column_widths):
+    """Создание листа потоковой записи с заданной шириной столбцов (в пикселях)."""
+    ws = wb.create_sheet(title=title)
+    for col_num, width in enumerate(column_widths or (), start=1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width / 13.43
+    return ws
+
+
+def section_cells(table, profile):
+    """
+    Матрица (строки x столбцы таблицы): ячейка содержит название раздела.
+    Вычисляется один раз на таблицу документа и передается в table_pages и запись файлов.
+    """
+    flags = np.zeros(table.shape, dtype=bool)
+    for column in profile.section_columns:
+        position = table.columns.get_loc(column)
+        flags[:, position] = classify(table[column])[profile.section_label].to_numpy()
+    return flags
+
+
+def paginate(groups, is_section, rows_per_page):
+    """
+    Границы страниц [(начало, конец), ...] за один проход по строкам.
+    groups - номер исходной записи для каждой строки (строки одного перенесенного
+    наименования имеют одинаковый номер), is_section - строка является заголовком раздела.
+    Блок (заголовки разделов вместе со следующей записью) переносится на новую страницу
+    целиком; блок длиннее страницы делится по границам страниц.
+    """
+    groups = np.asarray(groups)
+    n_rows = len(groups)
+    pages = []
+    page_start, line = 0, 0
+
+    def place(start, stop):
+        nonlocal page_start, line
+        size = stop - start
+        if line and line + size > rows_per_page:
+            pages.append((page_start, start))
+            page_start, line = start, 0
+        # Блок длиннее страницы занимает несколько страниц целиком
+        while line + size > rows_per_page:
+            cut = start + rows_per_page - line
+            pages.append((page_start, cut))
+            page_start, line, start, size = cut, 0, cut, stop - cut
+        line += size
+
+    # Начала записей: строки, где меняется номер исходной записи
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if n_rows else np.array([], dtype=int)
+    block_start = 0
+    for number, start in enumerate(starts):
+        stop = starts[number + 1] if number + 1 < len(starts) else n_rows
+        if is_section[start] and stop < n_rows:
+            continue  # заголовок раздела присоединяется к следующей записи
+        place(block_start, stop)
+        block_start = stop
+
+    if line:
+        pages.append((page_start, n_rows))
+    return pages
+
+
+def table_pages(table, profile, sections):
+    """
+    Страницы таблицы по профилю: разделы (sections - section_cells) и записи
+    (индекс таблицы - номер исходной записи).
+    """
+    is_section = sections.any(axis=1)
+    return paginate(table.index.to_numpy(), is_section, profile.rows_per_page)
+
+
+def write_workbook(table, pages, profile, output_path, sections):
+    """
+    Потоковая запись таблицы в книгу: страница pages[i] - лист «Лист{i+1}»;
+    sections - ячейки разделов (section_cells).
+    """
+    wb = Workbook(write_only=True)
+    register_named_styles(wb, profile.styles)
+    rows = table.itertuples(index=False, name=None)
+
+    for sheet_number, (start, stop) in enumerate(pages, start=1):
+        ws = create_write_only_sheet(wb, f"Лист{sheet_number}", profile.column_widths)
+        for line in range(stop - start):
+            row = next(rows)
+            row_sections = sections[start + line]
+            cells = []
+            for column, value in enumerate(row):
+                value = excel_value(value)
+                cell = WriteOnlyCell(ws, value=value)
+                style = profile.cell_style(column, value, row_sections[column], line)
+                if style:
+                    cell.style = style
+                cells.append(cell)
+            for style in profile.trailing_cells:
+                if style is None:
+                    cells.append(None)
+                    continue
+                cell = WriteOnlyCell(ws)
+                cell.style = style
+                cells.append(cell)
+            ws.append(cells)
+
+    if not pages:
+        create_write_only_sheet(wb, "Лист1", profile.column_widths)
+    wb.save(output_path)
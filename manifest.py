@@ -0,0 +1,65 @@
+"""
+Манифест выходного файла: хэш содержимого каждой страницы (листа) МП или МК.
+
+Манифест хранится рядом с выходным файлом (output_MP.xlsx.manifest.json) и позволяет
+при повторном запуске определить, какие страницы изменились, и не перезаписывать
+файл, если изменений нет.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+# Версия манифеста: увеличить при изменении оформления выходных файлов или разбиения на страницы
+MANIFEST_VERSION = 3
+
+
+def manifest_path(output_path):
+    """Путь к манифесту выходного файла."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.name}.manifest.json")
+
+
+def page_hashes(table, pages):
+    """Хэши страниц таблицы; pages - границы страниц [(начало, конец), ...] (см. layout.paginate)."""
+    if table.empty:
+        return []
+    # Хэши строк считаются векторно, хэш страницы - по байтам хэшей ее строк
+    row_hashes = pd.util.hash_pandas_object(table.astype(str), index=False).to_numpy()
+    return [hashlib.sha256(row_hashes[start:stop].tobytes()).hexdigest() for start, stop in pages]
+
+
+def load_manifest(output_path):
+    """Хэши страниц из манифеста или None, если манифест отсутствует или устарел."""
+    path = manifest_path(output_path)
+    if not path.exists() or not Path(output_path).exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest.get("pages")
+
+
+def changed_pages(output_path, hashes):
+    """
+    Номера страниц (с 1), отличающихся от сохраненных в манифесте.
+    Страницы, исчезнувшие из нового варианта, тоже считаются измененными.
+    """
+    old_hashes = load_manifest(output_path)
+    if old_hashes is None:
+        return list(range(1, len(hashes) + 1))
+    return [
+        page for page in range(1, max(len(hashes), len(old_hashes)) + 1)
+        if page > len(hashes) or page > len(old_hashes) or hashes[page - 1] != old_hashes[page - 1]
+    ]
+
+
+def save_manifest(output_path, hashes):
+    """Сохранение манифеста рядом с выходным файлом."""
+    with open(manifest_path(output_path), "w", encoding="utf-8") as file:
+        json.dump({"version": MANIFEST_VERSION, "pages": hashes}, file, indent=1)
@@ -0,0 +1,196 @@
+"""
+Сопоставление строк спецификации с перечнем паспортов ЭКБ.
+
+Наименования в спецификации и в перечне отличаются пробелами, префиксом «ОСМ» и
+записью номиналов резисторов и конденсаторов. Поэтому обе стороны приводятся к
+нормализованному ключу (через simplify_component_name), и соединение выполняется
+по ключу хэш-соединением за O(n). Для оставшихся строк выполняется нечеткий поиск.
+Обозначения (слова с цифрами: тип, номинал, номер ТУ) должны совпадать полностью,
+включая буквы, - «1564ЛЕ3» и «1564ЛА3» разные детали; нечетко сравнивается остальной текст.
+Поэтому ключи перечня группируются по обозначениям (для наименований без цифр - по
+первому слову), и редакционным расстоянием проверяются только ключи той же группы,
+близкие по длине; из большой группы берутся ключи с наибольшим числом общих триграмм.
+"""
+import json
+import re
+import heapq
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+
+import pandas as pd
+
+from ekb_list_generator import simplify_component_name
+from sections import labels
+
+# Минимальная схожесть (1 - расстояние Левенштейна / длина) для нечеткого совпадения
+FUZZY_THRESHOLD = 0.85
+# Сколько кандидатов группы с наибольшим числом общих триграмм проверять редакционным расстоянием
+FUZZY_CANDIDATES = 10
+
+MATCH_COLUMN = 'Совпадение'
+PASSPORT_NAME_COLUMN = 'Наименование в перечне'
+# Флаги проверки (validation.py), вычисляемые при соединении: компонент без паспорта и паспорт по похожему наименованию
+NO_PASSPORT_COLUMN = '_Без паспорта'
+FUZZY_MATCH_COLUMN = '_Похожее наименование'
+
+_SPACE_BEFORE_UNIT = re.compile(r'(\d)\s+(?=[^\W\d_])')
+_DECIMAL_COMMA = re.compile(r'(\d),(\d)')
+_DESIGNATOR = re.compile(r'\S*\d\S*')
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Нормализованный ключ наименования для сопоставления (пустая строка для пропусков)."""
+    if not isinstance(name, str):
+        return ''
+    name = " ".join(name.split())
+    if not name:
+        return ''
+    name = simplify_component_name(name)
+    name = _DECIMAL_COMMA.sub(r'\1.\2', name)
+    name = _SPACE_BEFORE_UNIT.sub(r'\1', name)
+    return " ".join(name.split()).casefold()
+
+
+def levenshtein(a, b):
+    """Редакционное расстояние между строками."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def designators(key):
+    """Обозначения в ключе наименования: слова с цифрами в порядке записи."""
+    return tuple(_DESIGNATOR.findall(key))
+
+
+def _block(key):
+    """Группа ключа для нечеткого поиска: обозначения или, если их нет, первое слово."""
+    return designators(key) or tuple(key.split()[:1])
+
+
+@lru_cache(maxsize=65536)
+def _trigrams(key):
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass
+class MatchReport:
+    """Итоги сопоставления спецификации с перечнем паспортов."""
+    exact: int = 0
+    fuzzy: list = field(default_factory=list)      # [{'name', 'passport_name', 'score'}]
+    unmatched: list = field(default_factory=list)  # наименования без паспорта
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(asdict(self), file, ensure_ascii=False, indent=1)
+
+
+class PassportMatcher:
+    """Индекс перечня паспортов по нормализованному ключу с нечетким поиском."""
+
+    def __init__(self, passports, fuzzy_threshold=FUZZY_THRESHOLD):
+        self.fuzzy_threshold = fuzzy_threshold
+        # Ключи могут быть уже вычислены (например, при выборке из базы паспортов)
+        keys = passports['_key'] if '_key' in passports else passports['Наименование'].map(normalize_name)
+        # Разные записи одной детали дают один ключ: для ключа берется первая строка перечня,
+        # иначе соединение размножило бы строки спецификации на все паспорта ключа
+        self.passports = passports.assign(_key=keys)[keys != ''].drop_duplicates(subset='_key')
+        # Наименование в перечне для каждого ключа
+        self.names = dict(zip(self.passports['_key'], self.passports['Наименование']))
+        self._blocks = None
+
+    def _build_blocks(self):
+        blocks = defaultdict(list)
+        for key in self.names:
+            blocks[_block(key)].append(key)
+        return blocks
+
+    def fuzzy_lookup(self, key):
+        """Лучший ключ перечня для ключа спецификации и его схожесть (или (None, 0.0))."""
+        if self._blocks is None:
+            self._blocks = self._build_blocks()
+
+        # Типы и номиналы совпадают точно («Р1-12 2к» и «Р1-12 20к» - разные детали): кандидаты из той же группы.
+        # Схожесть не выше 1 - разность длин / большая длина, поэтому далекие по длине ключи не проверяются
+        candidates = [candidate for candidate in self._blocks.get(_block(key), ())
+                      if 1 - abs(len(candidate) - len(key)) / max(len(candidate), len(key)) >= self.fuzzy_threshold]
+        if len(candidates) > FUZZY_CANDIDATES:
+            grams = _trigrams(key)
+            candidates = heapq.nlargest(FUZZY_CANDIDATES, candidates, key=lambda candidate: len(grams & _trigrams(candidate)))
+
+        best_key, best_score = None, 0.0
+        for candidate in candidates:
+            score = 1 - levenshtein(key, candidate) / max(len(key), len(candidate))
+            if score > best_score:
+                best_key, best_score = candidate, score
+        if best_score < self.fuzzy_threshold:
+            return None, 0.0
+        return best_key, best_score
+
+    def join(self, specification):
+        """
+        Левое соединение спецификации с перечнем. К столбцам спецификации добавляются
+        'Паспорт', 'Дата', MATCH_COLUMN (достоверность совпадения 0..1), PASSPORT_NAME_COLUMN
+        и флаги проверки NO_PASSPORT_COLUMN, FUZZY_MATCH_COLUMN.
+        """
+        spec_keys = specification['Наименование'].map(normalize_name)
+        is_component = component_mask(specification) & (spec_keys != '')
+
+        # Каждый уникальный ключ ищется один раз: сначала точно, затем нечетко
+        match_keys, scores = {}, {}
+        for key in spec_keys[is_component].unique():
+            if key in self.names:
+                match_keys[key], scores[key] = key, 1.0
+                continue
+            found, score = self.fuzzy_lookup(key)
+            if found is not None:
+                match_keys[key], scores[key] = found, score
+
+        # Без совпадений map дает столбец float64 из пропусков, который не соединяется с текстовыми ключами
+        specification = specification.assign(**{'_key': spec_keys.map(match_keys).astype(object),
+                                                MATCH_COLUMN: spec_keys.map(scores)})
+        passports = self.passports[['_key', 'Наименование', 'Паспорт', 'Дата']].rename(
+            columns={'Наименование': PASSPORT_NAME_COLUMN})
+        # Ключи перечня уникальны: строка спецификации получает не больше одного паспорта
+        merged = pd.merge(specification, passports, on='_key', how='left', validate='many_to_one')
+        # Флаги проверки по результату сопоставления (строки merged в порядке спецификации)
+        passport = merged['Паспорт']
+        has_passport = (passport.notna() & (passport.astype(object) != '')).to_numpy()
+        merged[NO_PASSPORT_COLUMN] = is_component.to_numpy() & ~has_passport
+        merged[FUZZY_MATCH_COLUMN] = has_passport & (merged[MATCH_COLUMN] < 1).to_numpy()
+        return merged.drop(columns='_key')
+
+
+def component_mask(table):
+    """Строки компонентов: заголовки разделов паспортов не имеют и в отчет не попадают."""
+    row_labels = labels(table)
+    return ~(row_labels['section_mk'] | row_labels['italic_mk'])
+
+
+def match_passports(specification, passports, fuzzy_threshold=FUZZY_THRESHOLD):
+    """Сопоставление спецификации с перечнем паспортов."""
+    return PassportMatcher(passports, fuzzy_threshold).join(specification)
+
+
+def build_match_report(merged_data):
+    """Отчет о сопоставлении по результату match_passports/merge_data."""
+    components = merged_data[component_mask(merged_data)].drop_duplicates(subset=['Наименование'])
+    scores = components[MATCH_COLUMN]
+    fuzzy = components[scores < 1]
+    return MatchReport(
+        exact=int((scores == 1).sum()),
+        fuzzy=[
+            {'name': name, 'passport_name': passport_name, 'score': round(float(score), 3)}
+            for name, passport_name, score in zip(fuzzy['Наименование'], fuzzy[PASSPORT_NAME_COLUMN], fuzzy[MATCH_COLUMN])
+        ],
+        unmatched=components.loc[scores.isna(), 'Наименование'].tolist(),
+    )
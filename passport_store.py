@@ -0,0 +1,155 @@
+"""
+Локальная база паспортов ЭКБ (SQLite).
+
+В базе хранятся паспорта всех партий сразу: строки перечней паспортов и файлов
+«Заключения» в исходном виде (наименование, паспорт, дата) и нормализованный ключ
+наименования (matching.normalize_name) с индексом. При сопоставлении из базы
+выбираются только паспорта компонентов спецификации, поэтому разбирать большой
+перечень Excel при каждом запуске не нужно.
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from matching import PassportMatcher, normalize_name
+
+# Версия базы: увеличить при изменении normalize_name - ключи будут пересчитаны при открытии
+STORE_VERSION = 1
+# Расширения файлов, которые load_passports открывает как базу паспортов
+STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+# Ограничение SQLite на число параметров запроса
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS passports (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    passport TEXT,
+    date TEXT,
+    source TEXT,
+    UNIQUE (name, passport)
+);
+CREATE INDEX IF NOT EXISTS passports_key ON passports (key);
+"""
+
+COLUMNS = ['Наименование', 'Паспорт', 'Дата']
+
+
+def is_store_path(path):
+    """Путь указывает на базу паспортов, а не на перечень Excel."""
+    return Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+def _text(value):
+    return None if pd.isna(value) else str(value)
+
+
+class PassportStore:
+    """База паспортов в файле SQLite. Соединение открывается на каждую операцию,
+    поэтому объект можно использовать из разных потоков."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(_SCHEMA)
+            if connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                self._rebuild_keys(connection)
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    @staticmethod
+    def _rebuild_keys(connection):
+        rows = connection.execute("SELECT id, name FROM passports").fetchall()
+        connection.executemany("UPDATE passports SET key = ? WHERE id = ?",
+                               [(normalize_name(name), row_id) for row_id, name in rows])
+
+    def __len__(self):
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM passports").fetchone()[0]
+
+    def sources(self):
+        """Источники (имена файлов) и число паспортов из каждого."""
+        with closing(self._connect()) as connection:
+            return dict(connection.execute("SELECT source, COUNT(*) FROM passports GROUP BY source ORDER BY MIN(id)"))
+
+    def add(self, passports, source):
+        """
+        Добавление паспортов из таблицы со столбцами (наименование, паспорт, дата) в
+        исходном виде. Паспорта, ранее загруженные из того же источника, заменяются;
+        повторы пары (наименование, паспорт) из других источников пропускаются.
+        Возвращает число добавленных строк.
+        """
+        rows = [
+            (name.strip(), normalize_name(name), _text(passport), _text(date), source)
+            for name, passport, date in passports.iloc[:, :3].itertuples(index=False, name=None)
+            if isinstance(name, str) and name.strip()
+        ]
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM passports WHERE source = ?", (source,))
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO passports (name, key, passport, date, source) VALUES (?, ?, ?, ?, ?)", rows)
+            return connection.total_changes - before
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def _select_by_keys(self, keys):
+        keys = sorted(keys)
+        frames = [
+            self._query(
+                f"SELECT id, name, passport, date FROM passports WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for chunk in (keys[start:start + _QUERY_CHUNK] for start in range(0, len(keys), _QUERY_CHUNK))
+        ]
+        if not frames:
+            return pd.DataFrame(columns=['id', 'name', 'passport', 'date'])
+        # Порядок строк как в исходных перечнях: от него зависит выбор первого наименования по ключу
+        return pd.concat(frames, ignore_index=True).sort_values('id', kind='stable')
+
+    def _select_keys(self, keys):
+        keys = sorted(keys)
+        found = []
+        with closing(self._connect()) as connection:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                found += [key for (key,) in connection.execute(
+                    f"SELECT DISTINCT key FROM passports WHERE key IN ({','.join('?' * len(chunk))})", chunk)]
+        return found
+
+    def passports_for(self, names, fuzzy=True):
+        """
+        Паспорта, нужные для сопоставления наименований names, в виде перечня
+        (столбцы 'Наименование', 'Паспорт', 'Дата' в исходном виде).
+        Точные совпадения выбираются по индексу ключа; для остальных наименований
+        нечеткий поиск выполняется по ключам базы без загрузки всех строк.
+        """
+        keys = {normalize_name(name) for name in pd.unique(pd.Series(names))} - {''}
+        found_keys = set(self._select_keys(keys))
+        missing = keys - found_keys
+        if fuzzy and missing:
+            # Первое наименование для каждого ключа - как в PassportMatcher по перечню Excel
+            index = self._query(
+                "SELECT key AS _key, name AS 'Наименование' FROM passports "
+                "WHERE id IN (SELECT MIN(id) FROM passports GROUP BY key) ORDER BY id")
+            matcher = PassportMatcher(index)
+            found_keys |= {matcher.fuzzy_lookup(key)[0] for key in missing} - {None}
+
+        rows = self._select_by_keys(found_keys)
+        return pd.DataFrame({
+            'Наименование': rows['name'].to_numpy(),
+            'Паспорт': rows['passport'].to_numpy(),
+            # Пустые даты - как при чтении Excel (NaN), а не None
+            'Дата': rows['date'].astype(object).where(rows['date'].notna(), np.nan).to_numpy(),
+        }, columns=COLUMNS)
+
+    def to_dataframe(self):
+        """Все паспорта базы в исходном виде."""
+        rows = self._query("SELECT name, passport, date FROM passports ORDER BY id")
+        return rows.set_axis(COLUMNS, axis=1)
@@ -0,0 +1,148 @@
+"""
+Профилирование обработки: время, число строк и пиковая память каждого этапа.
+
+Этапы backend вызываются через PipelineProfile.call, который замеряет время,
+число строк на входе (первая таблица среди аргументов) и на выходе (если этап
+возвращает таблицу) и прирост пиковой памяти по tracemalloc. Отчет сохраняется
+в JSON и выводится таблицей в консоли и в окне программы.
+
+Для подробного профиля по функциям есть profile_calls: cProfile (*.prof) или
+pyinstrument (*.html), если он установлен.
+"""
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pandas as pd
+
+REPORT_NAME = "profile.json"
+
+
+@dataclass
+class StageRecord:
+    """Замер одного этапа обработки."""
+    name: str
+    seconds: float
+    rows_in: int | None = None
+    rows_out: int | None = None
+    peak_memory_mb: float | None = None
+
+
+def _rows(value):
+    return len(value) if isinstance(value, pd.DataFrame) else None
+
+
+class NullProfile:
+    """Профиль-заглушка: этапы выполняются без замеров."""
+
+    def call(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+NO_PROFILE = NullProfile()
+
+
+class PipelineProfile:
+    """
+    Замеры этапов одной обработки. Пиковая память считается через tracemalloc
+    (он запускается на время профилирования и заметно замедляет обработку);
+    при параллельном выполнении этапов их пики памяти смешиваются.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.stages = []
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.total_seconds = None
+        self._owns_tracemalloc = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def call(self, func, *args, name=None, **kwargs):
+        """Выполнение этапа func(*args, **kwargs) с замером; имя этапа - имя функции."""
+        rows_in = next((len(arg) for arg in args if isinstance(arg, pd.DataFrame)), None)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        peak_memory_mb = None
+        if self.trace_memory:
+            peak_memory_mb = round((tracemalloc.get_traced_memory()[1] - memory_before) / 2**20, 2)
+        record = StageRecord(name or func.__name__, round(seconds, 4), rows_in, _rows(result), peak_memory_mb)
+        with self._lock:
+            self.stages.append(record)
+        return result
+
+    def stop(self):
+        """Завершение профилирования (останавливает tracemalloc, если его запустил профиль)."""
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        self.total_seconds = round(time.perf_counter() - self._started, 4)
+
+    def to_dict(self, **info):
+        """Отчет для JSON; info - дополнительные поля (например, путь к спецификации)."""
+        total = self.total_seconds if self.total_seconds is not None else round(time.perf_counter() - self._started, 4)
+        return {**info, 'total_seconds': total, 'stages': [asdict(stage) for stage in self.stages]}
+
+    def save(self, path, **info):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(**info), file, ensure_ascii=False, indent=1)
+
+
+def format_report(report):
+    """Отчет (PipelineProfile.to_dict) в виде текстовой таблицы."""
+    lines = [f"{'Этап':<28} {'Время, с':>9} {'Строк на входе':>15} {'на выходе':>10} {'Память, МБ':>11}"]
+    for stage in report['stages']:
+        lines.append(
+            f"{stage['name']:<28} {stage['seconds']:>9.3f} "
+            f"{_optional(stage['rows_in']):>15} {_optional(stage['rows_out']):>10} {_optional(stage['peak_memory_mb']):>11}"
+        )
+    lines.append(f"{'Всего':<28} {report['total_seconds']:>9.3f}")
+    return "\n".join(lines)
+
+
+def _optional(value):
+    return "-" if value is None else str(value)
+
+
+@contextmanager
+def profile_calls(path):
+    """
+    Профиль по функциям для кода внутри блока: pyinstrument для *.html (если установлен),
+    иначе cProfile (файл *.prof для snakeviz или pstats). Профилируется текущий поток.
+    """
+    path = Path(path)
+    if path.suffix == ".html":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            path = path.with_suffix(".prof")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield path
+            finally:
+                profiler.stop()
+                path.write_text(profiler.output_html(), encoding="utf-8")
+            return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,169 @@
+"""
+Проект: комплект плат, перечни МП и МК для которых формируются одной командой.
+
+Файл проекта (YAML), пути указываются относительно него:
+
+    passports:                          # общие перечни паспортов (*.xlsx) или база (*.db)
+      - список паспартов ЭКБ.xlsx
+    conclusions:                        # общие файлы «Заключения» (необязательно)
+      - "! Заключения 30П24.xlsx"
+    output_dir: output                  # папка результатов (по умолчанию output рядом с проектом)
+    boards:
+      - name: ЮМП.250.212.045.03
+        spec: ЮМП.250.212.045.03 Спецификация.xlsx
+      - name: ЮМП.250.212.045.07
+        spec: ЮМП.250.212.045.07 Спецификация.xlsx
+        outputs: [МП]                   # по умолчанию [МП, МК]
+        output_dir: output/045.07       # по умолчанию <output_dir>/<name>
+        passports: [паспорта 045.07.db]  # свои источники вместо общих
+        docx: true
+
+Один перечень Excel или одна база паспортов используются как есть. Несколько
+источников и файлы «Заключения» собираются в базу паспортов рядом с проектом
+(passport_store.py); база пересобирается только при изменении источников.
+Каждый набор источников разбирается один раз для всех плат.
+"""
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from backend import load_passports, read_passport_list
+from ekb_list_generator import read_conclusions
+from passport_store import PassportStore, is_store_path
+
+# Названия выходных документов в поле outputs
+OUTPUTS = {"МП": "mp", "MP": "mp", "МК": "mk", "MK": "mk"}
+
+
+@dataclass(frozen=True)
+class Board:
+    """Плата проекта."""
+    name: str
+    spec: Path
+    passports: tuple           # перечни паспортов (*.xlsx) или базы (*.db)
+    conclusions: tuple         # файлы «Заключения»
+    output_dir: Path
+    make_mp: bool = True
+    make_mk: bool = True
+    docx: bool = False
+
+
+@dataclass(frozen=True)
+class Project:
+    """Файл проекта и его платы."""
+    path: Path
+    boards: tuple
+
+    def select(self, names):
+        """Платы с указанными именами (все, если names пуст)."""
+        if not names:
+            return self.boards
+        unknown = set(names) - {board.name for board in self.boards}
+        if unknown:
+            raise ValueError(f"В проекте нет плат: {', '.join(sorted(unknown))}")
+        return tuple(board for board in self.boards if board.name in names)
+
+
+def _paths(base, value, field):
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError(f"Поле {field} должно быть путем или списком путей")
+    return tuple((base / item).resolve() for item in value)
+
+
+def _outputs(value, name):
+    outputs = set()
+    for item in value:
+        output = OUTPUTS.get(str(item).strip().upper())
+        if output is None:
+            raise ValueError(f"Плата {name}: неизвестный документ {item!r} (допустимо МП, МК)")
+        outputs.add(output)
+    return outputs
+
+
+def load_project(path):
+    """Чтение файла проекта. Ошибки описания проекта - ValueError."""
+    path = Path(path).resolve()
+    base = path.parent
+    with open(path, "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file) or {}
+
+    passports = _paths(base, config.get("passports"), "passports")
+    conclusions = _paths(base, config.get("conclusions"), "conclusions")
+    output_root = base / config.get("output_dir", "output")
+
+    boards = []
+    for number, item in enumerate(config.get("boards") or [], start=1):
+        if not isinstance(item, dict) or "spec" not in item:
+            raise ValueError(f"Плата №{number}: не указан файл спецификации (spec)")
+        spec = (base / item["spec"]).resolve()
+        name = str(item.get("name") or spec.stem)
+        board_passports = _paths(base, item["passports"], "passports") if "passports" in item else passports
+        board_conclusions = _paths(base, item["conclusions"], "conclusions") if "conclusions" in item else conclusions
+        if not board_passports and not board_conclusions:
+            raise ValueError(f"Плата {name}: не указаны источники паспортов (passports или conclusions)")
+        outputs = _outputs(item.get("outputs", ["МП", "МК"]), name)
+        output_dir = (base / item["output_dir"]).resolve() if "output_dir" in item else output_root / name
+        boards.append(Board(name, spec, board_passports, board_conclusions, output_dir,
+                            "mp" in outputs, "mk" in outputs, bool(item.get("docx", False))))
+
+    if not boards:
+        raise ValueError(f"В проекте {path.name} нет плат (boards)")
+    names = [board.name for board in boards]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Повторяются имена плат: {', '.join(sorted(duplicates))}")
+    return Project(path, tuple(boards))
+
+
+def passports_store_path(project, passports, conclusions):
+    """Путь к базе паспортов проекта для набора источников (рядом с файлом проекта)."""
+    digest = hashlib.sha1("\n".join(map(str, passports + ("",) + conclusions)).encode("utf-8")).hexdigest()[:8]
+    return project.path.with_name(f".{project.path.stem}.passports-{digest}.db")
+
+
+def _store_is_current(store_path, sources):
+    # Набор источников закодирован в имени базы, поэтому достаточно сравнить время изменения
+    if not store_path.exists():
+        return False
+    built = store_path.stat().st_mtime_ns
+    return all(source.stat().st_mtime_ns <= built for source in sources)
+
+
+def resolve_passports(project, passports, conclusions):
+    """
+    Файл паспортов для платы: единственный перечень или база используются как есть
+    (перечень Excel разбирается сразу, и рабочие процессы берут его из кэша),
+    иначе источники собираются в базу паспортов проекта.
+    """
+    if len(passports) == 1 and not conclusions:
+        load_passports(passports[0])
+        return passports[0]
+
+    store_path = passports_store_path(project, passports, conclusions)
+    if _store_is_current(store_path, passports + conclusions):
+        return store_path
+    store_path.unlink(missing_ok=True)
+    store = PassportStore(store_path)
+    for source in passports:
+        # Базы паспортов копируются в базу проекта целиком
+        rows = PassportStore(source).to_dataframe() if is_store_path(source) else read_passport_list(source)
+        store.add(rows, source=source.name)
+    for source in conclusions:
+        store.add(read_conclusions(source), source=source.name)
+    return store_path
+
+
+def resolve_project_passports(project, boards):
+    """Файлы паспортов плат {имя платы: путь}; каждый набор источников разбирается один раз."""
+    resolved = {}
+    for board in boards:
+        key = (board.passports, board.conclusions)
+        if key not in resolved:
+            resolved[key] = resolve_passports(project, *key)
+    return {board.name: resolved[(board.passports, board.conclusions)] for board in boards}
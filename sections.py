@@ -0,0 +1,97 @@
+"""
+Классификатор строк спецификации по разделам.
+
+Весь словарь разделов хранится здесь и компилируется один раз в общее регулярное
+выражение. Каждое уникальное наименование разбирается один раз (результат
+кэшируется), а метки для столбца вычисляются одним проходом по уникальным значениям.
+Спецификация размечается один раз при подготовке (add_labels): метки хранятся в
+служебных столбцах LABEL_COLUMNS, и следующие этапы берут их оттуда (labels).
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Категории: (ключевые слова, учитывать регистр)
+CATEGORIES = {
+    # Заголовки разделов, выводимые отдельной строкой
+    'section_mp': (["Конденсаторы", "Микросхемы", "Диоды", "Транзисторы"], False),
+    'section_mk': (["Конденсаторы", "Микросхемы", "Диоды", "Транзисторы", "Резисторы", "Сборочные единицы"], False),
+    # Строки, выделяемые курсивом
+    'italic_mp': ([
+        "Конденсаторы", "Микросхемы", "Катушки", "индуктивности", "Резисторы",
+        "Печатная плата", "Транзисторы", "Диоды", "Соединения", "контактные"
+    ], True),
+    'italic_mk': ([
+        "Конденсаторы", "Микросхемы", "Катушки", "индуктивности", "Резисторы",
+        "Печатная плата", "Транзисторы", "Диоды", "Соединения", "контактные", "Сборочные единицы", "Трансформаторы"
+    ], True),
+    # Разделы, не попадающие в перечень
+    'unwanted_mp': ([
+        "Документация", "Сборочный чертеж", "Сборочные единицы", "Плата печатная",
+        "Прочие изделия", "Джамперы", "Оловянная перемычка"
+    ], False),
+    'unwanted_mk': (["Документация", "Сборочный чертеж", "Прочие изделия", "Джамперы", "Оловянная перемычка"], False),
+}
+
+LABELS = list(CATEGORIES)
+
+_KEYWORDS = sorted({keyword.lower() for keywords, _ in CATEGORIES.values() for keyword in keywords}, key=len, reverse=True)
+
+# Просмотр вперед находит вхождения, начинающиеся в каждой позиции (в том числе перекрывающиеся);
+# более длинные слова идут первыми, а входящие в них как префикс учитываются через _PREFIXES
+_PATTERN = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in _KEYWORDS) + "))", re.IGNORECASE)
+_PREFIXES = {keyword: [other for other in _KEYWORDS if keyword.startswith(other)] for keyword in _KEYWORDS}
+
+# Для каждого ключевого слова (в нижнем регистре) - список (метка, слово, учитывать регистр)
+_KEYWORD_LABELS = {}
+for _label, (_keywords, _case_sensitive) in CATEGORIES.items():
+    for _keyword in _keywords:
+        _KEYWORD_LABELS.setdefault(_keyword.lower(), []).append((_label, _keyword, _case_sensitive))
+
+
+@lru_cache(maxsize=65536)
+def classify_name(name):
+    """Метки одного наименования в порядке LABELS."""
+    flags = dict.fromkeys(LABELS, False)
+    if not isinstance(name, str) or not name:
+        return tuple(flags.values())
+
+    for match in _PATTERN.finditer(name):
+        start = match.start()
+        for found in _PREFIXES[match.group(1).lower()]:
+            for label, keyword, case_sensitive in _KEYWORD_LABELS[found]:
+                if not case_sensitive or name.startswith(keyword, start):
+                    flags[label] = True
+    return tuple(flags.values())
+
+
+def classify(names):
+    """
+    Метки для столбца наименований: DataFrame с булевыми столбцами LABELS
+    и тем же индексом, что у names. Каждое уникальное значение разбирается один раз.
+    """
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    table = np.array([classify_name(name) for name in uniques], dtype=bool).reshape(len(uniques), len(LABELS))
+    return pd.DataFrame(table[codes], index=names.index, columns=LABELS)
+
+
+# Служебные столбцы с метками строк спецификации (backend.prepare_specification)
+LABEL_COLUMNS = {label: f"_{label}" for label in LABELS}
+
+
+def add_labels(table, column='Наименование'):
+    """Таблица со служебными столбцами LABEL_COLUMNS - метками наименований column."""
+    labels = classify(table[column])
+    return table.assign(**{LABEL_COLUMNS[label]: labels[label].to_numpy() for label in LABELS})
+
+
+def labels(table, column='Наименование'):
+    """
+    Метки строк таблицы: из столбцов LABEL_COLUMNS, сохраненных add_labels, без повторного
+    разбора наименований; для неразмеченной таблицы - classify(table[column]).
+    """
+    if all(name in table for name in LABEL_COLUMNS.values()):
+        return pd.DataFrame({label: table[LABEL_COLUMNS[label]].to_numpy() for label in LABELS}, index=table.index)
+    return classify(table[column])
@@ -0,0 +1,203 @@
+"""
+Локальный HTTP-сервис формирования МП и МК (aiohttp).
+
+Сервис один раз загружает перечень паспортов ЭКБ и держит его в памяти рабочих
+процессов вместе с кэшем классификатора разделов и переносов наименований, поэтому
+запрос не разбирает перечень заново, а только объединяет спецификацию с паспортами
+и записывает книги. Перечень загружается повторно, только если файл изменился.
+Одновременно обрабатывается не больше jobs спецификаций (пул процессов); если в
+очереди больше max_pending запросов, сервис отвечает 503.
+
+    python cli.py serve --ekb "список паспартов ЭКБ.xlsx" --jobs 2
+
+Запросы (тело запроса - файл спецификации *.xlsx):
+    POST /mp                        - ответ: output_MP.xlsx
+    POST /mk                        - ответ: output_MK.xlsx
+    POST /process?mp=1&mk=1&docx=0  - ответ: zip со всеми созданными файлами
+    GET  /status                    - перечень паспортов, число процессов и запросов в очереди
+
+    curl --data-binary @spec.xlsx http://127.0.0.1:8765/mp -o output_MP.xlsx
+
+Клиент (submit_specification) использует только стандартную библиотеку, поэтому
+окну программы aiohttp не нужен.
+"""
+import asyncio
+import io
+import json
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from backend import load_passports, load_specification, prepare_specification, process_specification
+from watch import file_state
+
+try:
+    from aiohttp import web
+except ImportError:  # aiohttp не установлен - доступен только клиент
+    web = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+DEFAULT_JOBS = 2
+# Запросов в очереди на один рабочий процесс, сверх которых сервис отвечает 503
+PENDING_PER_JOB = 4
+# Наибольший размер загружаемой спецификации, байт
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+# Ожидание ответа сервиса клиентом, с
+CLIENT_TIMEOUT = 600
+# Файл в архиве ответа с номерами страниц выходных файлов {имя файла: [страницы]}
+PAGES_NAME = "pages.json"
+ZIP_TYPE = "application/zip"
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Имя загруженной спецификации во временной папке запроса
+_SPEC_NAME = "spec.xlsx"
+
+# Подготовленный перечень паспортов рабочего процесса: ((путь, состояние файла), паспорта)
+_passports = None
+
+
+def _warm_passports(ekb_file):
+    """Перечень паспортов рабочего процесса; загружается заново только при изменении файла."""
+    global _passports
+    key = (ekb_file, file_state(ekb_file))
+    if _passports is None or _passports[0] != key:
+        _passports = (key, load_passports(ekb_file))
+    return _passports[1]
+
+
+def _generate(spec_file, ekb_file, make_mp, make_mk, docx):
+    """
+    Формирование МП и МК в рабочем процессе рядом с загруженной спецификацией.
+    Возвращает {имя файла: содержимое} всех созданных файлов и номера страниц {имя файла: страницы}.
+    """
+    prepared = prepare_specification(load_specification(spec_file)), _warm_passports(ekb_file)
+    output_dir = Path(spec_file).parent
+    created = process_specification(spec_file, ekb_file, output_dir, make_mp, make_mk, docx=docx, prepared=prepared)
+    pages = {path.name: book_pages for path, book_pages in created.items()}
+    files = {path.name: path.read_bytes() for path in sorted(output_dir.iterdir()) if path.name != _SPEC_NAME}
+    return files, pages
+
+
+def _archive(files, pages):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+        archive.writestr(PAGES_NAME, json.dumps(pages, ensure_ascii=False))
+    return buffer.getvalue()
+
+
+def _flag(request, name, default):
+    value = request.query.get(name)
+    return default if value is None else value.lower() in ("1", "true", "yes")
+
+
+class Service:
+    """Сервис формирования МП и МК с перечнем паспортов ekb_file в памяти рабочих процессов."""
+
+    def __init__(self, ekb_file, jobs=DEFAULT_JOBS, max_pending=None):
+        self.ekb_file = str(Path(ekb_file).resolve())
+        self.jobs = jobs
+        self.max_pending = max_pending or jobs * PENDING_PER_JOB
+        self.pending = 0
+        self.executor = None
+
+    def application(self):
+        if web is None:
+            raise ImportError("Для сервиса нужен aiohttp (poetry install -E service)")
+        app = web.Application(client_max_size=MAX_UPLOAD_BYTES)
+        app.on_startup.append(self._start)
+        app.on_cleanup.append(self._stop)
+        app.router.add_post("/mp", self.handle_mp)
+        app.router.add_post("/mk", self.handle_mk)
+        app.router.add_post("/process", self.handle_process)
+        app.router.add_get("/status", self.handle_status)
+        return app
+
+    async def _start(self, app):
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_passports,
+                                            initargs=(self.ekb_file,))
+        # Процессы запускаются и загружают перечень паспортов до первого запроса
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_passports, self.ekb_file)
+                               for _ in range(self.jobs)))
+
+    async def _stop(self, app):
+        self.executor.shutdown(cancel_futures=True)
+
+    async def _run(self, request, make_mp, make_mk, docx):
+        if self.pending >= self.max_pending:
+            raise web.HTTPServiceUnavailable(text="Сервис занят, повторите запрос позже")
+        self.pending += 1
+        try:
+            content = await request.read()
+            if not content:
+                raise web.HTTPBadRequest(text="Тело запроса должно содержать файл спецификации (*.xlsx)")
+            with tempfile.TemporaryDirectory() as directory:
+                spec_file = Path(directory) / _SPEC_NAME
+                spec_file.write_bytes(content)
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _generate, str(spec_file), self.ekb_file, make_mp, make_mk, docx)
+        except web.HTTPException:
+            raise
+        except Exception as exc:
+            raise web.HTTPUnprocessableEntity(text=f"{type(exc).__name__}: {exc}")
+        finally:
+            self.pending -= 1
+
+    async def handle_mp(self, request):
+        files, _ = await self._run(request, True, False, False)
+        return web.Response(body=files["output_MP.xlsx"], content_type=XLSX_TYPE)
+
+    async def handle_mk(self, request):
+        files, _ = await self._run(request, False, True, False)
+        return web.Response(body=files["output_MK.xlsx"], content_type=XLSX_TYPE)
+
+    async def handle_process(self, request):
+        make_mp, make_mk = _flag(request, "mp", True), _flag(request, "mk", True)
+        if not make_mp and not make_mk:
+            raise web.HTTPBadRequest(text="Не выбран ни один документ (mp, mk)")
+        files, pages = await self._run(request, make_mp, make_mk, _flag(request, "docx", False))
+        return web.Response(body=_archive(files, pages), content_type=ZIP_TYPE)
+
+    async def handle_status(self, request):
+        return web.json_response({"ekb": self.ekb_file, "jobs": self.jobs, "pending": self.pending,
+                                  "max_pending": self.max_pending})
+
+
+def run_service(ekb_file, host=DEFAULT_HOST, port=DEFAULT_PORT, jobs=DEFAULT_JOBS):
+    """Запуск сервиса до прерывания (Ctrl+C)."""
+    service = Service(ekb_file, jobs)
+    app = service.application()
+    web.run_app(app, host=host, port=port,
+                print=lambda _: print(f"Сервис: http://{host}:{port}, перечень ЭКБ: {service.ekb_file} (Ctrl+C - выход)"))
+
+
+def submit_specification(url, spec_file, output_dir, make_mp=True, make_mk=True, docx=False, timeout=CLIENT_TIMEOUT):
+    """
+    Отправка спецификации сервису url; созданные файлы сохраняются в output_dir.
+    Возвращает {путь к выходному файлу: номера страниц}, как process_specification.
+    Ошибка сервиса - RuntimeError с его сообщением.
+    """
+    query = urllib.parse.urlencode({"mp": int(make_mp), "mk": int(make_mk), "docx": int(docx)})
+    request = urllib.request.Request(f"{url.rstrip('/')}/process?{query}", data=Path(spec_file).read_bytes(),
+                                     headers={"Content-Type": XLSX_TYPE}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+    except urllib.error.HTTPError as exc:
+        raise RuntimeError(exc.read().decode("utf-8", errors="replace") or str(exc)) from None
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        pages = json.loads(archive.read(PAGES_NAME))
+        for name in archive.namelist():
+            if name != PAGES_NAME:
+                (output_dir / Path(name).name).write_bytes(archive.read(name))
+    return {output_dir / name: book_pages for name, book_pages in pages.items()}
@@ -0,0 +1,5 @@
+"""Проверки поведения модулей обработки; модули проекта импортируются из корня репозитория."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
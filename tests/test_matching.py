@@ -0,0 +1,97 @@
+"""Сопоставление наименований спецификации с перечнем паспортов (matching.py)."""
+import pandas as pd
+import pytest
+
+from matching import (FUZZY_MATCH_COLUMN, MATCH_COLUMN, NO_PASSPORT_COLUMN, PassportMatcher, designators,
+                      match_passports, normalize_name)
+
+
+def passports(*names):
+    return pd.DataFrame({
+        'Наименование': list(names),
+        'Паспорт': [f"ПДРФ.28П23-{number}" for number in range(1, len(names) + 1)],
+        'Дата': "08.2023",
+    })
+
+
+def specification(*names):
+    return pd.DataFrame({
+        'Поз.': pd.array(range(1, len(names) + 1), dtype='Int64'),
+        'Наименование': pd.array(names, dtype='string'),
+        'Кол.': pd.array([1] * len(names), dtype='Int64'),
+    })
+
+
+@pytest.mark.parametrize("first, second", [
+    ("ОСМ 2Д522Б дР3.362.029 ТУ", "2Д522Б дР3.362.029 ТУ"),
+    ("1564ЛА3  АЕЯР.431200.424-13ТУ ", "1564ЛА3 АЕЯР.431200.424-13ТУ"),
+    ("К10-17в 50 В 0,1 мкФ Н90 ±20% ОЖ0.460.107 ТУ", "К10-17в 50В 0.1мкФ"),
+    ("Р1-12 2 к", "р1-12 2к"),
+])
+def test_normalize_name_merges_spellings_of_one_part(first, second):
+    assert normalize_name(first) == normalize_name(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Р1-12 2к", "Р1-12 20к"),
+    ("1564ЛЕ3", "1564ЛА3"),
+])
+def test_normalize_name_keeps_different_parts_apart(first, second):
+    assert normalize_name(first) != normalize_name(second)
+
+
+@pytest.mark.parametrize("name", [None, "", "   ", float("nan")])
+def test_normalize_name_of_missing_name_is_empty(name):
+    assert normalize_name(name) == ''
+
+
+def test_designators_are_words_with_digits():
+    assert designators(normalize_name("Р1-12 2к")) == ("р1-12", "2к")
+    assert designators("дроссель высокочастотный") == ()
+
+
+def test_fuzzy_lookup_compares_only_keys_with_the_same_designators():
+    matcher = PassportMatcher(passports("Джампер ВП1-2 АГ0.481.303 ТУ", "Джамперы ВП1-3 АГ0.481.303 ТУ"))
+
+    found, score = matcher.fuzzy_lookup(normalize_name("Джамперы ВП1-2 АГ0.481.303 ТУ"))
+
+    assert found == normalize_name("Джампер ВП1-2 АГ0.481.303 ТУ")
+    assert 0.85 <= score < 1
+
+
+def test_fuzzy_lookup_without_designators_blocks_on_first_word():
+    matcher = PassportMatcher(passports("Перемычка монтажная", "Перемычки монтажные", "Провод монтажный"))
+
+    assert matcher.fuzzy_lookup(normalize_name("Перемычка монтажна"))[0] == normalize_name("Перемычка монтажная")
+    assert matcher.fuzzy_lookup(normalize_name("Проволока монтажная")) == (None, 0.0)
+
+
+@pytest.mark.parametrize("name, passport_name", [
+    ("1564ЛЕ3 АЕЯР.431200.424-13ТУ", "1564ЛА3 АЕЯР.431200.424-13ТУ"),
+    ("2Т3129Б9 аА0.336.668 ТУ", "2Т3129А9 аА0.336.668 ТУ"),
+    ("К10-17б 50 В 0,1 мкФ", "К10-17в 50 В 0,1 мкФ"),
+    ("Р1-12 2к", "Р1-12 20к"),
+])
+def test_different_letter_or_nominal_designator_does_not_match(name, passport_name):
+    merged = match_passports(specification(name), passports(passport_name))
+
+    assert merged['Паспорт'].isna().all()
+    assert merged[MATCH_COLUMN].isna().all()
+
+
+def test_one_passport_per_key_keeps_specification_rows():
+    merged = match_passports(
+        specification("К10-17в 50 В 0,1 мкФ Н90", "К10-17в 50 В 0,1 мкФ М47", "1564ЛА3"),
+        passports("К10-17в 50 В 0,1 мкФ", "ОСМ К10-17в 50В 0.1 мкФ", "1564ЛА3"))
+
+    assert len(merged) == 3
+    assert merged['Паспорт'].tolist() == ["ПДРФ.28П23-1", "ПДРФ.28П23-1", "ПДРФ.28П23-3"]
+
+
+def test_join_flags_rows_for_validation():
+    merged = match_passports(
+        specification("1564ЛА3", "Джамперы ВП1-2 АГ0.481.303 ТУ", "1564ЛЕ3"),
+        passports("1564ЛА3", "Джампер ВП1-2 АГ0.481.303 ТУ"))
+
+    assert merged[NO_PASSPORT_COLUMN].tolist() == [False, False, True]
+    assert merged[FUZZY_MATCH_COLUMN].tolist() == [False, True, False]
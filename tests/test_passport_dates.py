@@ -0,0 +1,58 @@
+"""Даты паспортов из файлов «Заключения»: от строки заключения до года окончания (столбец I)."""
+import pandas as pd
+import pytest
+
+from backend import merge_data, prepare_passports, prepare_specification
+from ekb_list_generator import conclusion_manufacture_date, read_conclusions
+from passport_store import PassportStore
+
+
+def specification(*names):
+    return prepare_specification(pd.DataFrame({
+        'Поз.': pd.array(range(1, len(names) + 1), dtype='Int64'),
+        'Наименование': pd.array(names, dtype='string'),
+        'Кол.': pd.array([1] * len(names), dtype='Int64'),
+    }))
+
+
+@pytest.fixture
+def conclusion_file(tmp_path):
+    path = tmp_path / "! Заключения 28П23.xlsx"
+    pd.DataFrame({
+        '№': [1, 2, 3],
+        'Тип изделия (номер партии)': ["1564ЛА3 (партия 5)", "2Т3129А9 (партия 7)", "ОСМ 2Д522Б (партия 1)"],
+        'Дата изготовления': ["08.23", "нед. 22 2022", "пер. 3.1998"],
+    }).to_excel(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("08.23", "08.2023"),
+    ("8.2023", "08.2023"),
+    ("3.98", "03.1998"),
+    ("нед. 22 2022", "22.2022"),
+    ("2022 г. нед. 22", "22.2022"),
+    ("пер. 08.23", "08.2023"),
+])
+def test_conclusion_date_has_full_year(value, expected):
+    assert conclusion_manufacture_date(value) == expected
+
+
+def test_conclusion_row_round_trips_to_expiry_year(tmp_path, conclusion_file):
+    store = PassportStore(tmp_path / "passports.db")
+    store.add(read_conclusions(conclusion_file), source=conclusion_file.name)
+
+    merged = merge_data(specification("1564ЛА3", "2Т3129А9", "2Д522Б"), store)
+
+    assert merged['Дата'].tolist() == ["08.2023", "22.2022", "03.1998"]
+    assert merged['I'].tolist() == [2048, 2047, 2023]
+
+
+def test_passport_list_with_two_digit_years_round_trips():
+    # Перечень, сформированный до приведения дат, и старые базы паспортов хранят год двумя цифрами
+    passports = prepare_passports(pd.DataFrame({
+        'Наименование': ["1564ЛА3"], 'Паспорт': ["ПДРФ.28П23-1"], 'Дата': ["08.23"]}))
+
+    merged = merge_data(specification("1564ЛА3"), passports)
+
+    assert merged['I'].tolist() == [2048]
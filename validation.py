@@ -0,0 +1,145 @@
+"""
+Проверка спецификации и результата сопоставления с перечнем ЭКБ.
+
+Признаки замечаний вычисляются на тех этапах, где данные уже есть, и хранятся в
+служебных столбцах: исходные нечисловые Поз. и Кол. - при загрузке (RAW_COLUMNS),
+позиции, количества и признак повтора - при объединении повторов (POSITIONS_COLUMN,
+DUPLICATE_QUANTITIES_COLUMN, REPEATED_COLUMN), отсутствие паспорта и нечеткое
+совпадение - при сопоставлении (matching.py), нераспознанная дата - при расчете срока
+службы (BAD_DATE_COLUMN). Отчет по таблице после merge_data только собирает отмеченные строки.
+
+Отчет сохраняется рядом с МП: output_MP.validation.json и книга output_MP.validation.xlsx
+с листом «Проверка» (по строке на замечание).
+"""
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+from matching import FUZZY_MATCH_COLUMN, MATCH_COLUMN, NO_PASSPORT_COLUMN, PASSPORT_NAME_COLUMN, component_mask
+
+# Исходные значения Поз. и Кол., которые не являются числами (для остальных строк - пропуск)
+RAW_COLUMNS = {'Поз.': '_Поз. исходное', 'Кол.': '_Кол. исходное'}
+# Все количества повторяющегося наименования (только для наименований с разным количеством)
+DUPLICATE_QUANTITIES_COLUMN = '_Кол. в повторах'
+# Все позиции наименования после объединения повторов (backend.aggregate_duplicates)
+POSITIONS_COLUMN = '_Поз. все'
+# Признаки проверок, вычисляемые при объединении повторов и добавлении срока службы (backend.py)
+REPEATED_COLUMN = '_Повтор'
+BAD_DATE_COLUMN = '_Дата не распознана'
+
+# Проверки в порядке вывода в отчете
+CHECKS = {
+    'no_passport': 'Нет паспорта',
+    'fuzzy_match': 'Паспорт по похожему наименованию',
+    'expired': 'Истек срок службы',
+    'bad_date': 'Дата паспорта не распознана',
+    'repeated': 'Повтор наименования, Кол. сложено',
+    'quantity_conflict': 'Разное количество в повторах',
+    'bad_position': 'Поз. не число',
+    'bad_quantity': 'Кол. не число',
+}
+REPORT_COLUMNS = ['Проверка', 'Поз.', 'Наименование', 'Значение']
+
+
+@dataclass
+class ValidationReport:
+    """Замечания по спецификации: число по каждой проверке и список замечаний."""
+    counts: dict = field(default_factory=dict)
+    issues: list = field(default_factory=list)  # [{'check', 'position', 'name', 'value'}]
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(asdict(self), file, ensure_ascii=False, indent=1)
+
+    def save_sheet(self, path):
+        """Книга с листом «Проверка»: по строке на замечание."""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Проверка")
+        ws.column_dimensions['A'].width = 32
+        ws.column_dimensions['C'].width = 60
+        ws.column_dimensions['D'].width = 24
+        ws.append(REPORT_COLUMNS)
+        for issue in self.issues:
+            ws.append([CHECKS[issue['check']], issue['position'], issue['name'], issue['value']])
+        wb.save(path)
+
+
+def validation_report_path(output_path, suffix=".json"):
+    """Путь к отчету о проверке рядом с output_MP.xlsx (suffix - .json или .xlsx)."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.validation{suffix}")
+
+
+def _column(table, name):
+    return table[name] if name in table else pd.Series(pd.NA, index=table.index, dtype=object)
+
+
+def _text(value):
+    if value is None or (not isinstance(value, (str, tuple)) and pd.isna(value)):
+        return ''
+    if isinstance(value, tuple):
+        return ", ".join(map(_text, value))
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def build_validation_report(merged_data, today=None):
+    """
+    Отчет о проверке по результату merge_data: компоненты без паспорта, паспорта,
+    найденные нечетким поиском (наименование в перечне и схожесть), истекший срок
+    службы (год окончания I раньше текущего), нераспознанные даты паспортов, повторы
+    наименования (все позиции и суммарное Кол.) и разное количество в них, нечисловые Поз. и Кол.
+    Признаки замечаний уже вычислены при сопоставлении и объединении повторов; здесь
+    они только читаются, а значения для отчета форматируются для отмеченных строк.
+    """
+    year = (today or date.today()).year
+    components = merged_data[component_mask(merged_data)]
+    expiry = components['I']
+    raw_position = _column(components, RAW_COLUMNS['Поз.'])
+    raw_quantity = _column(components, RAW_COLUMNS['Кол.'])
+    conflicts = _column(components, DUPLICATE_QUANTITIES_COLUMN)
+
+    # Проверка -> (признак по строкам, значение для отмеченных строк)
+    checks = {
+        'no_passport': (components[NO_PASSPORT_COLUMN], lambda rows: pd.Series('', index=rows.index)),
+        'fuzzy_match': (components[FUZZY_MATCH_COLUMN],
+                        lambda rows: rows[PASSPORT_NAME_COLUMN].astype(object).map(_text) + " ("
+                        + rows[MATCH_COLUMN].round(2).astype(str) + ")"),
+        'expired': (components['H'].notna() & (expiry < year).fillna(False).astype(bool), lambda rows: rows['I']),
+        'bad_date': (components[BAD_DATE_COLUMN], lambda rows: rows['Дата']),
+        'repeated': (_column(components, REPEATED_COLUMN).fillna(False).astype(bool), lambda rows: rows['Кол.']),
+        'quantity_conflict': (conflicts.notna(), lambda rows: conflicts[rows.index]),
+        'bad_position': (raw_position.notna(), lambda rows: raw_position[rows.index]),
+        'bad_quantity': (raw_quantity.notna() | components['Кол.'].isna(),
+                         lambda rows: raw_quantity[rows.index].fillna('')),
+    }
+
+    frames = []
+    for check, (mask, values) in checks.items():
+        mask = mask.to_numpy(dtype=bool)
+        if not mask.any():
+            continue
+        rows = components[mask]
+        # Для объединенных повторов в отчет попадают все позиции наименования
+        positions = _column(rows, POSITIONS_COLUMN)
+        positions = positions.where(positions.notna(), rows['Поз.'])
+        frames.append(pd.DataFrame({
+            'check': check,
+            'position': positions.astype(object).map(_text).to_numpy(),
+            'name': rows['Наименование'].astype(object).to_numpy(),
+            'value': values(rows).astype(object).map(_text).to_numpy(),
+        }))
+
+    if not frames:
+        return ValidationReport(counts=dict.fromkeys(CHECKS, 0))
+    issues = pd.concat(frames, ignore_index=True)
+    counts = issues['check'].value_counts()
+    return ValidationReport(
+        counts={check: int(counts.get(check, 0)) for check in CHECKS},
+        issues=issues.to_dict('records'),
+    )
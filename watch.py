@@ -0,0 +1,193 @@
+"""
+Режим наблюдения: перечни МП и МК формируются заново при сохранении спецификации
+или перечня ЭКБ.
+
+Изменения файлов определяются по времени изменения и размеру: опросом или, если
+установлен watchdog, по событиям файловой системы (inotify и аналоги). Серия
+изменений при сохранении (Excel пишет временный файл и подменяет исходный)
+обрабатывается один раз после паузы DEBOUNCE_SECONDS.
+
+Подготовленные данные хранятся между запусками (PreparedInputs): заново разбирается
+только измененный файл. При изменении только перечня ЭКБ МК не формируется, так как
+от паспортов не зависит; неизмененные страницы не перезаписываются (инкрементальный режим).
+"""
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+from backend import load_passports, load_specification, prepare_specification, process_specification
+from profiling import NO_PROFILE
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog не установлен - изменения определяются опросом
+    Observer = None
+
+# Файл с путями к спецификации и перечню ЭКБ, которые запомнило окно программы
+CONFIG_PATH = Path(__file__).parent / "spec_path_config.yaml"
+# Пауза после последнего изменения файла перед обработкой, с
+DEBOUNCE_SECONDS = 0.3
+# Период опроса файлов, с
+POLL_INTERVAL = 0.1
+# Ожидание событий watchdog без изменений (для проверки остановки), с
+_IDLE_TIMEOUT = 1.0
+
+
+def read_config(config_path=CONFIG_PATH):
+    """Пути к спецификации и перечню ЭКБ из файла настроек окна программы."""
+    with open(config_path, "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file) or {}
+    return config.get("spec_path", ""), config.get("ekb_path", "")
+
+
+def file_state(path):
+    """Состояние файла для обнаружения изменений: (время изменения, размер) или None, если файла нет."""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ChangeMonitor:
+    """
+    Изменения набора файлов с подавлением дребезга: файл считается сохраненным,
+    если он существует и не менялся debounce секунд.
+    """
+
+    def __init__(self, paths, debounce=DEBOUNCE_SECONDS):
+        self.paths = [Path(path) for path in paths]
+        self.debounce = debounce
+        self._states = {path: file_state(path) for path in self.paths}
+        self._pending = {}  # файл -> время последнего замеченного изменения
+
+    @property
+    def pending(self):
+        """Есть изменения, ожидающие окончания паузы."""
+        return bool(self._pending)
+
+    def poll(self, now=None):
+        """Файлы, изменения которых завершились к моменту now."""
+        now = time.monotonic() if now is None else now
+        for path in self.paths:
+            state = file_state(path)
+            if state != self._states[path]:
+                self._states[path] = state
+                self._pending[path] = now
+        ready = {path for path, changed in self._pending.items()
+                 if now - changed >= self.debounce and self._states[path] is not None}
+        for path in ready:
+            del self._pending[path]
+        return ready
+
+
+def _start_observer(paths, wake):
+    """Наблюдатель watchdog за папками файлов; события будят цикл наблюдения. None без watchdog."""
+    if Observer is None:
+        return None
+    watched = {path.resolve() for path in paths}
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            targets = (event.src_path, getattr(event, "dest_path", ""))
+            if any(target and Path(target).resolve() in watched for target in targets):
+                wake.set()
+
+    observer = Observer()
+    for directory in {path.parent for path in watched}:
+        observer.schedule(Handler(), str(directory), recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+def watch_changes(paths, debounce=DEBOUNCE_SECONDS, interval=POLL_INTERVAL, stop=None):
+    """
+    Генератор наборов сохраненных файлов из paths. Состояние файлов запоминается при вызове,
+    поэтому изменения во время обработки предыдущего набора не пропускаются.
+    Без watchdog файлы опрашиваются каждые interval секунд; с watchdog опрос идет только
+    во время паузы после события. stop - threading.Event для завершения наблюдения.
+    """
+    monitor = ChangeMonitor(paths, debounce)
+    wake = threading.Event()
+    observer = _start_observer(monitor.paths, wake)
+    return _changes(monitor, observer, wake, interval, stop or threading.Event())
+
+
+def _changes(monitor, observer, wake, interval, stop):
+    try:
+        while not stop.is_set():
+            if observer is None or monitor.pending:
+                stop.wait(interval)
+            else:
+                wake.wait(_IDLE_TIMEOUT)
+            wake.clear()
+            changed = monitor.poll()
+            if changed:
+                yield changed
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+class PreparedInputs:
+    """
+    Подготовленные спецификация и перечень паспортов, общие для нескольких запусков.
+    Файл разбирается заново, только если изменились его путь, время изменения или размер.
+    """
+
+    def __init__(self):
+        self._cache = {}      # вид файла -> ((путь, состояние), подготовленные данные)
+        self.changed = set()  # виды файлов ('spec', 'ekb'), разобранные при последней загрузке
+
+    def _get(self, kind, path, load):
+        key = (str(Path(path).resolve()), file_state(path))
+        cached = self._cache.get(kind)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = load(path)
+        self._cache[kind] = (key, value)
+        self.changed.add(kind)
+        return value
+
+    def load(self, spec_file, ekb_file, profile=NO_PROFILE):
+        """Загрузка как backend.load_prepared с повторным использованием неизмененных данных."""
+        self.changed = set()
+        specification = self._get(
+            "spec", spec_file,
+            lambda path: profile.call(prepare_specification, profile.call(load_specification, path)))
+        passports = self._get("ekb", ekb_file, lambda path: profile.call(load_passports, path))
+        return specification, passports
+
+
+class WatchSession:
+    """Повторное формирование МП и МК одной платы при изменении входных файлов."""
+
+    def __init__(self, spec_file, ekb_file, output_dir=None, make_mp=True, make_mk=True, docx=False):
+        self.spec_file = str(spec_file)
+        self.ekb_file = str(ekb_file)
+        self.output_dir = Path(output_dir) if output_dir else Path(spec_file).parent / "output"
+        self.make_mp = make_mp
+        self.make_mk = make_mk
+        self.docx = docx
+        self.inputs = PreparedInputs()
+
+    @property
+    def paths(self):
+        return [Path(self.spec_file), Path(self.ekb_file)]
+
+    def run(self):
+        """
+        Формирование по измененным файлам (при первом запуске - по всем).
+        Возвращает словарь {путь к выходному файлу: номера измененных страниц}.
+        """
+        prepared = self.inputs.load(self.spec_file, self.ekb_file)
+        if not self.inputs.changed:
+            return {}
+        return process_specification(self.spec_file, self.ekb_file, self.output_dir, make_mp=self.make_mp,
+                                     make_mk=self.make_mk and "spec" in self.inputs.changed, incremental=True,
+                                     docx=self.docx, prepared=prepared)
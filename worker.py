@@ -0,0 +1,123 @@
+"""
+Фоновая обработка спецификации для графического интерфейса.
+
+Обработка выполняется в QThreadPool, чтобы окно не блокировалось. После загрузки
+данных МП и МК формируются по очереди: обработка pandas и openpyxl удерживает GIL,
+поэтому второй поток не ускоряет ее. О ходе работы сообщают сигналы Qt. ServiceWorker
+вместо обработки в окне отправляет спецификацию локальному сервису (service.py).
+"""
+import threading
+import traceback
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from backend import MK_STAGES, MP_STAGES, ProcessingCancelled, load_prepared, process_specification
+from profiling import NO_PROFILE, REPORT_NAME, PipelineProfile
+from service import submit_specification
+
+LOAD_STAGE = "Загрузка данных"
+SERVICE_STAGE = "Обработка на сервере"
+
+
+class ProcessingSignals(QObject):
+    """Сигналы фоновой обработки (QRunnable не является QObject)."""
+    progress = pyqtSignal(int, str)  # процент выполнения, текущий этап
+    finished = pyqtSignal(dict)      # {путь к выходному файлу: номера измененных листов}
+    failed = pyqtSignal(str)         # описание ошибки
+    profiled = pyqtSignal(dict)      # отчет профилирования (PipelineProfile.to_dict)
+    cancelled = pyqtSignal()
+
+
+class ProcessingWorker(QRunnable):
+    """Задача обработки одной спецификации с поддержкой отмены."""
+
+    def __init__(self, spec_file, ekb_file, output_dir, make_mp=True, make_mk=True, incremental=False, profile=False,
+                 docx=False, inputs=None):
+        super().__init__()
+        self.spec_file = spec_file
+        self.ekb_file = ekb_file
+        self.output_dir = Path(output_dir)
+        self.make_mp = make_mp
+        self.make_mk = make_mk
+        self.incremental = incremental
+        self.docx = docx
+        # Подготовленные данные прошлых запусков (watch.PreparedInputs): неизмененные файлы не разбираются
+        self.inputs = inputs
+        self.profile = PipelineProfile() if profile else NO_PROFILE
+        self.signals = ProcessingSignals()
+        self._cancel_event = threading.Event()
+        self._started_stages = 0
+        self._total_stages = 1 + len(MP_STAGES) * make_mp + len(MK_STAGES) * make_mk
+
+    def cancel(self):
+        """Запрос отмены: обработка прервется перед началом следующего этапа."""
+        self._cancel_event.set()
+
+    def _on_stage(self, stage):
+        if self._cancel_event.is_set():
+            raise ProcessingCancelled()
+        percent = 100 * self._started_stages // self._total_stages
+        self._started_stages += 1
+        self.signals.progress.emit(percent, stage)
+
+    def run(self):
+        try:
+            self._on_stage(LOAD_STAGE)
+            load = self.inputs.load if self.inputs is not None else load_prepared
+            prepared = load(self.spec_file, self.ekb_file, self.profile)
+            created = process_specification(self.spec_file, self.ekb_file, self.output_dir, self.make_mp, self.make_mk,
+                                             self.incremental, self.profile, self.docx, prepared=prepared,
+                                             on_stage=self._on_stage)
+        except ProcessingCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as exc:
+            traceback.print_exc()
+            self.signals.failed.emit(f"{type(exc).__name__}: {exc}")
+            return
+        finally:
+            if self.profile is not NO_PROFILE:
+                self.profile.stop()
+
+        if self.profile is not NO_PROFILE:
+            self.profile.save(self.output_dir / REPORT_NAME, spec_file=self.spec_file)
+            self.signals.profiled.emit(self.profile.to_dict())
+        self.signals.progress.emit(100, "Готово")
+        self.signals.finished.emit(created)
+
+
+class ServiceWorker(QRunnable):
+    """
+    Отправка спецификации локальному сервису с перечнем паспортов в памяти.
+    Запрос к сервису не прерывается: при отмене его результат не показывается.
+    """
+
+    def __init__(self, url, spec_file, output_dir, make_mp=True, make_mk=True, docx=False):
+        super().__init__()
+        self.url = url
+        self.spec_file = spec_file
+        self.output_dir = Path(output_dir)
+        self.make_mp = make_mp
+        self.make_mk = make_mk
+        self.docx = docx
+        self.signals = ProcessingSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        self.signals.progress.emit(0, SERVICE_STAGE)
+        try:
+            created = submit_specification(self.url, self.spec_file, self.output_dir, self.make_mp, self.make_mk,
+                                           self.docx)
+        except Exception as exc:
+            traceback.print_exc()
+            self.signals.failed.emit(f"{type(exc).__name__}: {exc}")
+            return
+        if self._cancel_event.is_set():
+            self.signals.cancelled.emit()
+            return
+        self.signals.progress.emit(100, "Готово")
+        self.signals.finished.emit(created)
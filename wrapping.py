@@ -0,0 +1,114 @@
+"""
+Перенос наименований по ширине столбца с учетом ширины символов шрифта.
+
+Ширина текста считается не числом символов, а по таблице ширины символов шрифта:
+«Ш» и «Ю» заметно шире «1» и «г», поэтому перенос по len() то оставлял место,
+то вылезал за границу таблицы шаблона. Ширина столбца задается, как в Excel,
+числом цифр «0» (например, 18 - столько же, сколько 18 цифр).
+
+Одни и те же наименования (типы резисторов, конденсаторов) повторяются во всех
+платах, поэтому переносы запоминаются в ограниченном кэше по (наименование, ширина).
+"""
+from functools import lru_cache
+
+# Ширина символов в тысячных долях кегля (метрики Arial); символы одной ширины перечислены строкой
+_ARIAL_GROUPS = {
+    191: "'",
+    222: "ijlі",
+    260: "|",
+    278: " !,./:;[]\\Ift",
+    333: "()-`r",
+    334: "{}",
+    355: '"',
+    365: "г",
+    389: "*",
+    400: "°",
+    438: "к",
+    458: "зт",
+    469: "^",
+    500: "ckvsxyzJсух«»",
+    510: "э",
+    521: "чь",
+    531: "в",
+    542: "пяГ",
+    552: "н",
+    556: "0123456789#$?_abdeghnopquLаеёор–",
+    559: "ий",
+    573: "бц",
+    577: "µ",
+    583: "длК",
+    584: "+<=>~±",
+    604: "З",
+    611: "FTZТ",
+    625: "ъ",
+    635: "У",
+    656: "БЛЬ",
+    667: "ABEKPSVXY&АВЕЁРХЧ",
+    669: "ж",
+    677: "Д",
+    688: "м",
+    719: "ИЙПЭы",
+    722: "CDHNRUwСНЯ",
+    740: "Ц",
+    750: "ю",
+    760: "Ф",
+    768: "Ω",
+    778: "GOQО",
+    792: "Ъ",
+    802: "ш",
+    823: "фщ",
+    833: "mMМ",
+    885: "Ы",
+    889: "%",
+    917: "Ш",
+    923: "Ж",
+    938: "Щ",
+    944: "W",
+    1000: "—",
+    1010: "Ю",
+    1015: "@",
+    1073: "№",
+}
+
+FONT_WIDTHS = {
+    "Arial": {char: width for width, chars in _ARIAL_GROUPS.items() for char in chars},
+}
+DEFAULT_FONT_NAME = "Arial"
+# Ширина символов, которых нет в таблице (средняя ширина строчной буквы)
+DEFAULT_CHAR_WIDTH = 556
+# Размер кэша переносов и ширины слов
+WRAP_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def text_width(text, font=DEFAULT_FONT_NAME):
+    """Ширина текста в тысячных долях кегля."""
+    widths = FONT_WIDTHS[font]
+    return sum(widths.get(char, DEFAULT_CHAR_WIDTH) for char in text)
+
+
+def column_units(width, font=DEFAULT_FONT_NAME):
+    """Ширина столбца из числа цифр «0» в тысячные доли кегля."""
+    return width * FONT_WIDTHS[font]["0"]
+
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def wrap_text(text, width, font=DEFAULT_FONT_NAME):
+    """
+    Перенос текста по словам в строки шириной не более width цифр «0».
+    Слово шире столбца не разрывается и занимает отдельную строку.
+    Возвращает кортеж строк (пустой для пустого текста).
+    """
+    limit = column_units(width, font)
+    space = text_width(" ", font)
+    lines, words, line_width = [], [], 0
+    for word in str(text).split():
+        word_width = text_width(word, font)
+        if words and line_width + space + word_width > limit:
+            lines.append(" ".join(words))
+            words, line_width = [], 0
+        line_width += (space if words else 0) + word_width
+        words.append(word)
+    if words:
+        lines.append(" ".join(words))
+    return tuple(lines)